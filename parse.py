@@ -37,14 +37,14 @@ Examples:
     
     # Simple parser
     simple_parser = subparsers.add_parser("simple", help="Regex-based parser (no dependencies)")
-    simple_parser.add_argument("input", nargs="+", help="Header files or folders")
+    simple_parser.add_argument("input", help="Header file to process")
     simple_parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
     simple_parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
     simple_parser.add_argument("--output", "-o", help="Output file (default: stdout)")
     
     # Tree-sitter parser
     ts_parser = subparsers.add_parser("tree-sitter", help="Tree-sitter based parser")
-    ts_parser.add_argument("input", nargs="+", help="Header files or folders")
+    ts_parser.add_argument("input", help="Header file to process")
     ts_parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
     ts_parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
     ts_parser.add_argument("--output", "-o", help="Output file (default: stdout)")
@@ -52,7 +52,7 @@ Examples:
     
     # CAST parser
     cast_parser = subparsers.add_parser("cast", help="CAST approach (structure-aware chunking)")
-    cast_parser.add_argument("input", nargs="+", help="Header files or folders")
+    cast_parser.add_argument("input", help="Header file to process")
     cast_parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
     cast_parser.add_argument("--min-chars", type=int, default=200, help="Min characters per chunk")
     cast_parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
@@ -61,7 +61,7 @@ Examples:
     
     # Enhanced parser
     enhanced_parser = subparsers.add_parser("enhanced", help="Enhanced parser (complete file coverage)")
-    enhanced_parser.add_argument("input", nargs="+", help="Header files or folders")
+    enhanced_parser.add_argument("input", help="Header file to process")
     enhanced_parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
     enhanced_parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
     enhanced_parser.add_argument("--semantic-only", action="store_true", help="Only include semantic elements")
@@ -71,7 +71,7 @@ Examples:
     
     # Azure indexer
     azure_parser = subparsers.add_parser("azure", help="Azure AI Search integration")
-    azure_parser.add_argument("input", nargs="+", help="Header files or folders")
+    azure_parser.add_argument("inputs", metavar="input", nargs="+", help="Header files or folders")
     azure_parser.add_argument("--azure-endpoint", help="Azure AI Search endpoint URL")
     azure_parser.add_argument("--azure-key", help="Azure AI Search admin key")
     azure_parser.add_argument("--index-name", default="c-code-index", help="Index name")
@@ -81,6 +81,7 @@ Examples:
     azure_parser.add_argument("--output", "-o", help="Save chunks to file instead of uploading")
     azure_parser.add_argument("--embedding-model", default="text-embedding-3-small", help="Embedding model")
     azure_parser.add_argument("--embedding-dim", type=int, default=1536, help="Embedding dimension")
+    azure_parser.set_defaults(overlap=1, openai_base=None)
     
     args = parser.parse_args()
     
@@ -88,86 +89,20 @@ Examples:
         parser.print_help()
         return 1
     
-    # Run the appropriate parser
+    # Each command's module is imported only when that command runs, and
+    # its run() takes the parsed arguments directly
     if args.command == "simple":
-        from parsing.visualization.visualize_simple import main as run_simple
-        sys.argv = [sys.argv[0]] + args.input
-        if args.max_chars:
-            sys.argv += ["--max-chars", str(args.max_chars)]
-        if args.one_per_symbol:
-            sys.argv += ["--one-per-symbol"]
-        if args.output:
-            sys.argv += ["--output", args.output]
-        return run_simple()
-    
+        from parsing.visualization.visualize_simple import run
     elif args.command == "tree-sitter":
-        from parsing.visualization.visualize_chunks import main as run_ts
-        sys.argv = [sys.argv[0]] + args.input
-        if args.max_chars:
-            sys.argv += ["--max-chars", str(args.max_chars)]
-        if args.one_per_symbol:
-            sys.argv += ["--one-per-symbol"]
-        if args.output:
-            sys.argv += ["--output", args.output]
-        if args.plain:
-            sys.argv += ["--plain"]
-        return run_ts()
-    
+        from parsing.visualization.visualize_chunks import run
     elif args.command == "cast":
-        from parsing.visualization.visualize_cast import main as run_cast
-        sys.argv = [sys.argv[0]] + args.input
-        if args.max_chars:
-            sys.argv += ["--max-chars", str(args.max_chars)]
-        if args.min_chars:
-            sys.argv += ["--min-chars", str(args.min_chars)]
-        if args.one_per_symbol:
-            sys.argv += ["--one-per-symbol"]
-        if args.no_hierarchy:
-            sys.argv += ["--no-hierarchy"]
-        if args.output:
-            sys.argv += ["--output", args.output]
-        return run_cast()
-    
+        from parsing.visualization.visualize_cast import run
     elif args.command == "enhanced":
-        from parsing.visualization.visualize_enhanced import main as run_enhanced
-        sys.argv = [sys.argv[0]] + args.input
-        if args.max_chars:
-            sys.argv += ["--max-chars", str(args.max_chars)]
-        if args.one_per_symbol:
-            sys.argv += ["--one-per-symbol"]
-        if args.semantic_only:
-            sys.argv += ["--semantic-only"]
-        if args.no_file_headers:
-            sys.argv += ["--no-file-headers"]
-        if args.no_section_headers:
-            sys.argv += ["--no-section-headers"]
-        if args.output:
-            sys.argv += ["--output", args.output]
-        return run_enhanced()
-    
+        from parsing.visualization.visualize_enhanced import run
     elif args.command == "azure":
-        from parsing.integration.azure_indexer import main as run_azure
-        sys.argv = [sys.argv[0]] + args.input
-        if args.azure_endpoint:
-            sys.argv += ["--azure-endpoint", args.azure_endpoint]
-        if args.azure_key:
-            sys.argv += ["--azure-key", args.azure_key]
-        if args.index_name:
-            sys.argv += ["--index-name", args.index_name]
-        if args.openai_key:
-            sys.argv += ["--openai-key", args.openai_key]
-        if args.max_chars:
-            sys.argv += ["--max-chars", str(args.max_chars)]
-        if args.one_per_symbol:
-            sys.argv += ["--one-per-symbol"]
-        if args.output:
-            sys.argv += ["--output", args.output]
-        if args.embedding_model:
-            sys.argv += ["--embedding-model", args.embedding_model]
-        if args.embedding_dim:
-            sys.argv += ["--embedding-dim", str(args.embedding_dim)]
-        return run_azure()
+        from parsing.integration.azure_indexer import run
     
+    run(args)
     return 0
 
 if __name__ == "__main__":
@@ -8,13 +8,16 @@ This script demonstrates how to:
 """
 
 import os
-import json
+import time
 import argparse
 import pathlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from typing import List, Dict, Any
 
 # Import our AST parser
 from parsing.parsers.c_ast_parser import CChunker
+from parsing.parsers.c_ast_parser_simple import _iter_header_files, _dumps
 # You can also use other parsers
 # from parsing.parsers.c_ast_parser_simple import CChunker as SimpleCChunker
 # from parsing.parsers.cast_parser import CASTChunker
@@ -36,9 +39,32 @@ from azure.search.documents.indexes.models import (
     VectorSearchAlgorithmMetric,
 )
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError
+from azure.core.pipeline.transport import RequestsTransport
+from requests import Session
+from requests.adapters import HTTPAdapter
 
 # OpenAI for embeddings
 import openai
+try:
+    from openai.error import RateLimitError, InvalidRequestError as BadRequestError   # openai<1
+except ImportError:
+    from openai import RateLimitError, BadRequestError                               # openai>=1
+
+# Number of inputs sent per embedding request (the API accepts up to 2048)
+EMBEDDING_BATCH_SIZE = 512
+# Number of attempts for a batch that keeps hitting the rate limit
+EMBEDDING_MAX_RETRIES = 5
+# Number of embedding requests kept in flight at once
+EMBEDDING_WORKERS = 8
+# Number of documents per upload request (Azure Search limit)
+UPLOAD_BATCH_SIZE = 1000
+# Number of upload requests kept in flight at once
+UPLOAD_WORKERS = 4
+# Number of attempts for a batch that keeps getting throttled
+UPLOAD_MAX_RETRIES = 5
+# HTTP statuses Azure Search uses to signal throttling or overload
+RETRYABLE_STATUS = {429, 503}
 
 class AzureSearchIndexer:
     """
@@ -72,10 +98,15 @@ class AzureSearchIndexer:
             endpoint=search_service_endpoint,
             credential=self.search_credential
         )
+        # Keep one connection per upload worker alive across batches
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS)
+        session.mount("https://", adapter)
         self.search_client = SearchClient(
             endpoint=search_service_endpoint,
             index_name=index_name,
-            credential=self.search_credential
+            credential=self.search_credential,
+            transport=RequestsTransport(session=session, session_owner=False)
         )
         self.index_name = index_name
         self.embedding_model = embedding_model
@@ -153,6 +184,89 @@ class AzureSearchIndexer:
             # Return a zero vector as fallback
             return [0.0] * self.embedding_dimension
     
+    def _embed_batch(self, texts: List[str]) -> List[array]:
+        """
+        Generate float32 embeddings for a batch of texts in a single request.
+        
+        A batch the API rejects as a bad request (e.g. one input over the token
+        limit) is split in half and retried, so only the offending texts fall back
+        to zero vectors. Any other error zero-fills the batch once.
+        """
+        delay = 1.0
+        for attempt in range(EMBEDDING_MAX_RETRIES):
+            try:
+                response = openai.Embedding.create(
+                    input=texts,
+                    model=self.embedding_model
+                )
+                data = sorted(response["data"], key=lambda d: d["index"])
+                # The index stores Single (float32) vectors, so keep them as
+                # packed float32 arrays rather than lists of Python floats
+                return [array("f", d["embedding"]) for d in data]
+            except RateLimitError as e:
+                if attempt == EMBEDDING_MAX_RETRIES - 1:
+                    print(f"Error generating embeddings: {e}")
+                    break
+                # Back off exponentially before retrying the same batch
+                time.sleep(delay)
+                delay *= 2
+            except BadRequestError as e:
+                if len(texts) > 1:
+                    mid = len(texts) // 2
+                    return self._embed_batch(texts[:mid]) + self._embed_batch(texts[mid:])
+                print(f"Warning: using a zero vector for a text that failed to embed: {e}")
+                break
+            except Exception as e:
+                print(f"Error generating embeddings: {e}")
+                break
+        
+        # Return zero vectors for the failed texts only
+        return [array("f", bytes(4 * self.embedding_dimension)) for _ in texts]
+    
+    def generate_embeddings(self, texts: List[str]) -> List[array]:
+        """Generate embeddings for the given texts, batching the API requests."""
+        # Headers repeat a lot of boilerplate; embed each distinct text once
+        unique = list(dict.fromkeys(texts))
+        batches = [unique[i:i+EMBEDDING_BATCH_SIZE] for i in range(0, len(unique), EMBEDDING_BATCH_SIZE)]
+        
+        # Requests are I/O-bound, so issue them from a small thread pool;
+        # map() yields results in submission order
+        embeddings = {}
+        with ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS) as executor:
+            for batch, batch_embeddings in zip(batches, executor.map(self._embed_batch, batches)):
+                embeddings.update(zip(batch, batch_embeddings))
+        return [embeddings[text] for text in texts]
+    
+    def _upload_batch(self, batch: List[Dict]) -> bool:
+        """Upload a single batch of documents to the search index."""
+        delay = 1.0
+        for attempt in range(UPLOAD_MAX_RETRIES):
+            last_attempt = attempt == UPLOAD_MAX_RETRIES - 1
+            try:
+                results = self.search_client.upload_documents(batch)
+            except HttpResponseError as e:
+                if e.status_code not in RETRYABLE_STATUS or last_attempt:
+                    print(f"Error uploading batch: {e}")
+                    return False
+            except Exception as e:
+                print(f"Error uploading batch: {e}")
+                return False
+            else:
+                # A multi-status response can throttle individual documents;
+                # resend only those
+                throttled = {r.key for r in results if not r.succeeded and r.status_code in RETRYABLE_STATUS}
+                if not throttled:
+                    return True
+                if last_attempt:
+                    print(f"Error uploading batch: {len(throttled)} documents still throttled")
+                    return False
+                batch = [document for document in batch if document["id"] in throttled]
+            
+            # Back off exponentially before retrying
+            time.sleep(delay)
+            delay *= 2
+        return False
+    
     def upload_chunks(self, chunks: List[Dict]) -> None:
         """Upload chunks to the search index."""
         if not chunks:
@@ -174,9 +288,6 @@ class AzureSearchIndexer:
                 if unit.get("name"):
                     names.append(unit.get("name"))
             
-            # Generate embedding
-            embedding = self.generate_embedding(chunk["content"])
-            
             # Create document
             document = {
                 "id": chunk["id"],
@@ -186,20 +297,51 @@ class AzureSearchIndexer:
                 "chunk_type": chunk_types,
                 "name": names,
                 "conditional_context": metadata.get("conditional_context", []),
-                "embedding": embedding
             }
             
             documents.append(document)
         
+        # Generate embeddings in batches and attach them to the documents
+        embeddings = self.generate_embeddings([chunk["content"] for chunk in chunks])
+        for document, embedding in zip(documents, embeddings):
+            document["embedding"] = _vector_payload(embedding)
+        
         # Upload in batches of 1000 (Azure Search limit)
-        batch_size = 1000
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i+batch_size]
-            try:
-                self.search_client.upload_documents(batch)
-                print(f"Uploaded batch {i//batch_size + 1}/{(len(documents)-1)//batch_size + 1}")
-            except Exception as e:
-                print(f"Error uploading batch: {e}")
+        batches = [documents[i:i+UPLOAD_BATCH_SIZE] for i in range(0, len(documents), UPLOAD_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            for n, uploaded in enumerate(executor.map(self._upload_batch, batches), 1):
+                if uploaded:
+                    print(f"Uploaded batch {n}/{len(batches)}")
+
+def _vector_payload(vector: array) -> List[float]:
+    """Convert a float32 vector to floats with the shortest JSON form that still round-trips."""
+    # 9 significant digits are enough to recover any float32 exactly, while
+    # repr() of the widened double would spell out ~17
+    return [float(f"{x:.9g}") for x in vector]
+
+# Per-process chunker used by the process_headers worker pool. tree-sitter
+# parsers can't be pickled, so each worker builds its own in _init_worker.
+_chunker = None
+
+def _init_worker(max_chunk_size: int, chunk_overlap: int, one_per_symbol: bool) -> None:
+    """Create the chunker for a process_headers worker."""
+    global _chunker
+    _chunker = CChunker(
+        max_chunk_size=max_chunk_size,
+        chunk_overlap_units=chunk_overlap,
+        one_symbol_per_chunk=one_per_symbol,
+        include_comments=True
+    )
+
+def _process_one(path: pathlib.Path) -> List[Dict]:
+    """Chunk a single header file inside a worker process."""
+    try:
+        print(f"Processing {path}")
+        source = path.read_text(encoding="utf-8", errors="ignore")
+        return _chunker.chunkify(source, filepath=str(path))
+    except Exception as e:
+        print(f"Error processing {path}: {e}")
+        return []
 
 def process_headers(
     input_paths: List[str],
@@ -210,6 +352,8 @@ def process_headers(
     """
     Process header files and generate chunks.
     
+    Files are chunked in parallel across CPU cores.
+    
     Args:
         input_paths: List of files or directories to process
         max_chunk_size: Maximum size of a chunk in characters
@@ -219,53 +363,20 @@ def process_headers(
     Returns:
         List of chunks
     """
-    chunker = CChunker(
-        max_chunk_size=max_chunk_size,
-        chunk_overlap_units=chunk_overlap,
-        one_symbol_per_chunk=one_per_symbol,
-        include_comments=True
-    )
+    paths = list(_iter_header_files(input_paths))
     
     chunks = []
-    for path in input_paths:
-        path = pathlib.Path(path)
-        if path.is_file() and path.suffix.lower() in (".h", ".hpp"):
-            try:
-                print(f"Processing {path}")
-                source = path.read_text(encoding="utf-8", errors="ignore")
-                file_chunks = chunker.chunkify(source, filepath=str(path))
-                chunks.extend(file_chunks)
-            except Exception as e:
-                print(f"Error processing {path}: {e}")
-        elif path.is_dir():
-            for file_path in path.rglob("*.h") or path.rglob("*.hpp"):
-                try:
-                    print(f"Processing {file_path}")
-                    source = file_path.read_text(encoding="utf-8", errors="ignore")
-                    file_chunks = chunker.chunkify(source, filepath=str(file_path))
-                    chunks.extend(file_chunks)
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
+    with ProcessPoolExecutor(
+        initializer=_init_worker,
+        initargs=(max_chunk_size, chunk_overlap, one_per_symbol)
+    ) as executor:
+        for file_chunks in executor.map(_process_one, paths, chunksize=8):
+            chunks.extend(file_chunks)
     
     return chunks
 
-def main():
-    """Main entry point."""
-    parser = argparse.ArgumentParser(description="Index C header files in Azure AI Search")
-    parser.add_argument("inputs", nargs="+", help="Header files or directories to process")
-    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
-    parser.add_argument("--overlap", type=int, default=1, help="Number of units to overlap")
-    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
-    parser.add_argument("--output", "-o", help="Save chunks to file instead of uploading")
-    parser.add_argument("--azure-endpoint", help="Azure Search endpoint")
-    parser.add_argument("--azure-key", help="Azure Search admin key")
-    parser.add_argument("--index-name", default="c-code-index", help="Azure Search index name")
-    parser.add_argument("--openai-key", help="OpenAI API key")
-    parser.add_argument("--openai-base", help="OpenAI API base URL (for Azure OpenAI)")
-    parser.add_argument("--embedding-model", default="text-embedding-ada-002", help="Embedding model name")
-    parser.add_argument("--embedding-dim", type=int, default=1536, help="Embedding dimension")
-    args = parser.parse_args()
-    
+def run(args: argparse.Namespace) -> None:
+    """Chunk the inputs, then save them to a file or upload them to Azure AI Search."""
     # Process header files
     chunks = process_headers(
         args.inputs,
@@ -278,9 +389,9 @@ def main():
     
     # Save to file if requested
     if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
+        with open(args.output, "wb") as f:
             for chunk in chunks:
-                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                f.write(_dumps(chunk) + b"\n")
         print(f"Saved chunks to {args.output}")
         return
     
@@ -305,5 +416,23 @@ def main():
     else:
         print("Azure Search credentials not provided. Use --output to save chunks to file.")
 
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Index C header files in Azure AI Search")
+    parser.add_argument("inputs", nargs="+", help="Header files or directories to process")
+    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
+    parser.add_argument("--overlap", type=int, default=1, help="Number of units to overlap")
+    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
+    parser.add_argument("--output", "-o", help="Save chunks to file instead of uploading")
+    parser.add_argument("--azure-endpoint", help="Azure Search endpoint")
+    parser.add_argument("--azure-key", help="Azure Search admin key")
+    parser.add_argument("--index-name", default="c-code-index", help="Azure Search index name")
+    parser.add_argument("--openai-key", help="OpenAI API key")
+    parser.add_argument("--openai-base", help="OpenAI API base URL (for Azure OpenAI)")
+    parser.add_argument("--embedding-model", default="text-embedding-ada-002", help="Embedding model name")
+    parser.add_argument("--embedding-dim", type=int, default=1536, help="Embedding dimension")
+    args = parser.parse_args()
+    run(args)
+
 if __name__ == "__main__":
     main()
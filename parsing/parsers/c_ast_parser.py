@@ -1,61 +1,123 @@
 import re
+import os
 import json
+import bisect
+import functools
 import hashlib
+import sqlite3
 import sys
 import pathlib
 import argparse
-from typing import Dict, List, Optional, Set, Tuple, Any, Iterator
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Dict, List, Optional, Set, Tuple, Any, Iterator, Union
 from dataclasses import dataclass, field, asdict
 
+from parsing.parsers.c_ast_parser_simple import _sha, _iter_header_files, _read_source, _dumps, _NODE_DATACLASS
+
 # Prefer language pack (bundles grammars); fallback to tree-sitter-languages if installed
 try:
     from tree_sitter_language_pack import get_parser   # pip: tree-sitter-language-pack
 except ImportError:
     from tree_sitter_languages import get_parser       # pip: tree-sitter-languages
 
+# grammar loading is the slow part of get_parser(); share one parser per process
+@functools.lru_cache(maxsize=1)
+def _c_parser():
+    return get_parser("c")
+
 # Regex for Doxygen comments (both /*! */ and /** */ styles)
-DOXYGEN_COMMENT = re.compile(r"/\*\*!(?:.|\n)*?\*/|/\*\*(?:.|\n)*?\*/", re.MULTILINE)
+DOXYGEN_COMMENT = re.compile(rb"/\*\*!?[\s\S]*?\*/")
 # Regular C comments (both block and line)
-C_COMMENT = re.compile(r"/\*(?:.|\n)*?\*/|//.*?$", re.MULTILINE)
+C_COMMENT = re.compile(rb"/\*[\s\S]*?\*/|//[^\n]*")
+# Comment cleanup and Doxygen tag patterns
+_COMMENT_DELIMS = re.compile(r"^/\*\*!?|\*/$|^//")
+# Leading "* " on every line of a comment body, stripped in one pass
+_COMMENT_STAR = re.compile(r"^[^\S\n]*\* ?", re.MULTILINE)
+# Line breaks other than \n that str.splitlines() also splits on
+_OTHER_BREAKS = re.compile("[\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]")
+_DOXY_TAG = re.compile(r"@(\w+)\s*(.*)")
+
+# Name patterns per node type, used by EmbeddedCParser._extract_name
+_FUNC_NAME = re.compile(r'(?:\w+\s+)+(\w+)\s*\(')
+_NAME_RE = {
+    # return_type name(params) / return_type name(params);
+    "function_definition": _FUNC_NAME,
+    "declaration": _FUNC_NAME,
+    # struct/enum/union name { ... } or name;
+    "struct_specifier": re.compile(r'struct\s+(\w+)'),
+    "enum_specifier": re.compile(r'enum\s+(\w+)'),
+    "union_specifier": re.compile(r'union\s+(\w+)'),
+    # typedef ... name;
+    "type_definition": re.compile(r'typedef\s+(?:.*?)\s+(\w+)\s*;'),
+    # #define NAME value / #define NAME(params) value
+    "preproc_def": re.compile(r'#define\s+(\w+)'),
+    "preproc_function_def": re.compile(r'#define\s+(\w+)\s*\('),
+}
 
-def _sha(*xs) -> str:
-    """Generate a short SHA hash from the inputs."""
-    return hashlib.sha1("|".join(map(str, xs)).encode()).hexdigest()[:16]
+# Number of parse results kept in memory by EmbeddedCParser.parse_source_bytes
+PARSE_CACHE_SIZE = 256
+# Recently parsed sources, shared by all parser instances (least recently used first)
+_PARSE_CACHE: "OrderedDict[str, List[ASTNode]]" = OrderedDict()
 
-def _line_offsets(s: str) -> List[int]:
+# Bump when the cached node layout, the parse output or the chunk format changes
+CACHE_SCHEMA_VERSION = 3
+
+def _grammar_version() -> str:
+    """Version of the installed grammar package, part of every cache key."""
+    for dist in ("tree-sitter-language-pack", "tree-sitter-languages", "tree-sitter"):
+        try:
+            return f"{dist}=={metadata.version(dist)}"
+        except metadata.PackageNotFoundError:
+            continue
+    return "unknown"
+
+def _line_offsets(b: bytes) -> List[int]:
     """Calculate byte offsets for each line in the source."""
-    offs, acc = [0], 0
-    for ln in s.splitlines(True):
-        acc += len(ln)
-        offs.append(acc)
-    return offs
+    # Running sum of line lengths, computed without a Python-level loop; offsets
+    # are in bytes, the same space tree-sitter reports node positions in
+    return list(accumulate(map(len, b.splitlines(True)), initial=0))
 
 def _byte_to_line(b: int, offs: List[int]) -> int:
     """Convert byte offset to line number."""
-    import bisect
     return bisect.bisect_right(offs, b) - 1
 
-def _find_nearest_comment(src: str, start_line: int, regex, max_gap: int = 5) -> Optional[Dict]:
-    """Find the nearest comment above the given line."""
-    blocks = [(m.start(), m.end(), m.group(0)) for m in regex.finditer(src)]
-    offs = _line_offsets(src)
-    best, gap = None, max_gap + 1
-    
-    for b0, b1, raw in blocks:
-        end_ln = _byte_to_line(b1, offs)
-        if 0 <= (start_line - end_ln) < gap:
-            best, gap = raw, start_line - end_ln
-            
-    if not best:
+def _comment_blocks(src: bytes, regex, offs: List[int]) -> List[Tuple[int, str]]:
+    """Find all comments matching regex as (end_line, raw) pairs, in source order."""
+    # Only the matched comments are decoded
+    return [(_byte_to_line(m.end(), offs), m.group(0).decode("utf-8", "ignore")) for m in regex.finditer(src)]
+
+@functools.lru_cache(maxsize=1024)
+def _clean_comment(raw: str) -> str:
+    """Strip comment delimiters and leading asterisks."""
+    body = _COMMENT_DELIMS.sub("", raw.strip())
+    if _OTHER_BREAKS.search(body):
+        body = "\n".join(body.splitlines())
+    return _COMMENT_STAR.sub("", body).strip()
+
+def _find_nearest_comment(blocks: List[Tuple[int, str]], end_lines: List[int],
+                          start_line: int, max_gap: int = 5) -> Optional[Dict]:
+    """Find the nearest comment above the given line.
+    
+    end_lines holds the end line of each block, i.e. [ln for ln, _ in blocks].
+    """
+    # Blocks are sorted by end line; take the last one ending at or above start_line
+    i = bisect.bisect_right(end_lines, start_line) - 1
+    if i < 0:
         return None
-        
-    # Clean up the comment
-    body = re.sub(r"^/\*\*!?|\*/$|^//", "", best.strip())
-    body = "\n".join(re.sub(r"^\s*\* ?", "", ln) for ln in body.splitlines())
+    end_ln = end_lines[i]
+    gap = start_line - end_ln
+    if gap > max_gap:
+        return None
+    # Several comments can end on the same line; the first one wins
+    best = blocks[bisect.bisect_left(end_lines, end_ln)][1]
     
     return {
         "raw": best,
-        "text": body.strip() or None,
+        "text": _clean_comment(best) or None,
         "line_gap": gap
     }
 
@@ -68,7 +130,7 @@ def _parse_doxygen_comment(comment: Dict) -> Dict:
     tags, free = {}, []
     
     for ln in body.splitlines():
-        m = re.match(r"@(\w+)\s*(.*)", ln)
+        m = _DOXY_TAG.match(ln)
         if m:
             tags.setdefault(m.group(1).lower(), []).append(m.group(2))
         else:
@@ -86,7 +148,7 @@ def _parse_doxygen_comment(comment: Dict) -> Dict:
         "line_gap": comment.get("line_gap")
     }
 
-@dataclass
+@dataclass(**_NODE_DATACLASS)
 class ASTNode:
     """Represents a node in the AST."""
     type: str
@@ -118,6 +180,49 @@ class ASTNode:
             
         return result
 
+class ParseCache:
+    """
+    On-disk cache of parsed nodes, keyed by source content and grammar version.
+    
+    Entries are stored as JSON in a SQLite table, so repeated runs over an
+    unchanged header tree skip tree-sitter and comment association entirely.
+    """
+    
+    def __init__(self, path: str = ".astcache/parse.sqlite"):
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS nodes (hash TEXT PRIMARY KEY, grammar_ver TEXT, nodes BLOB)"
+        )
+        self.grammar_ver = f"{_grammar_version()};schema={CACHE_SCHEMA_VERSION}"
+    
+    def get(self, key: str) -> Optional[List["ASTNode"]]:
+        """Return the cached nodes for key, or None on a miss."""
+        row = self.conn.execute(
+            "SELECT nodes FROM nodes WHERE hash = ? AND grammar_ver = ?", (key, self.grammar_ver)
+        ).fetchone()
+        if row is None:
+            return None
+        nodes = [ASTNode(**d) for d in json.loads(row[0])]
+        for node in nodes:
+            node.type = sys.intern(node.type)
+            if node.parent:
+                node.parent = sys.intern(node.parent)
+        return nodes
+    
+    def put(self, key: str, nodes: List["ASTNode"]) -> None:
+        """Store nodes under key, replacing any older entry."""
+        # Nodes are encoded as they are, without building intermediate dicts
+        blob = _dumps(nodes)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO nodes (hash, grammar_ver, nodes) VALUES (?, ?, ?)",
+                (key, self.grammar_ver, blob)
+            )
+    
+    def close(self) -> None:
+        self.conn.close()
+
 class EmbeddedCParser:
     """
     AST-aware parser for embedded C headers with comprehensive comment handling.
@@ -131,7 +236,7 @@ class EmbeddedCParser:
     """
     
     # Target node types to extract from the AST
-    TARGET_TYPES = {
+    TARGET_TYPES = frozenset({
         "function_definition",       # Function implementations
         "declaration",               # Function prototypes & variable declarations
         "struct_specifier",          # struct definitions
@@ -143,83 +248,51 @@ class EmbeddedCParser:
         "preproc_ifdef",             # #ifdef blocks
         "preproc_ifndef",            # #ifndef blocks
         "preproc_if",                # #if blocks
-    }
+    })
     
-    def __init__(self, include_comments: bool = True, max_comment_gap: int = 5):
+    def __init__(self, include_comments: bool = True, max_comment_gap: int = 5,
+                 cache: Optional[ParseCache] = None):
         """
         Initialize the parser.
         
         Args:
             include_comments: Whether to include regular comments in addition to Doxygen
             max_comment_gap: Maximum number of lines between a comment and code to associate them
+            cache: Optional on-disk cache of parse results
         """
-        self.parser = get_parser("c")
+        self.parser = _c_parser()
         self.include_comments = include_comments
         self.max_comment_gap = max_comment_gap
+        self.cache = cache
         
-    def _extract_name(self, node_type: str, code: str) -> Optional[str]:
+    # Node types whose tree-sitter node carries the identifier in a "name" field
+    NAME_FIELD_TYPES = frozenset({
+        "struct_specifier", "enum_specifier", "union_specifier",
+        "preproc_def", "preproc_function_def",
+    })
+    
+    def _extract_name(self, node, source_bytes: bytes, code: str) -> Optional[str]:
         """Extract the name of a declaration if possible."""
-        if node_type == "function_definition":
-            # Match function name: return_type name(params)
-            match = re.search(r'(?:\w+\s+)+(\w+)\s*\(', code)
-            if match:
-                return match.group(1)
-        
-        elif node_type == "declaration" and "(" in code:
-            # Function prototype: return_type name(params);
-            match = re.search(r'(?:\w+\s+)+(\w+)\s*\(', code)
-            if match:
-                return match.group(1)
-        
-        elif node_type == "struct_specifier":
-            # struct name { ... } or struct name;
-            match = re.search(r'struct\s+(\w+)', code)
-            if match:
-                return match.group(1)
+        node_type = node.type
+        if node_type in self.NAME_FIELD_TYPES:
+            name_node = node.child_by_field_name("name")
+            if name_node is not None:
+                return source_bytes[name_node.start_byte:name_node.end_byte].decode("utf-8", "ignore")
+        elif node_type == "function_definition":
+            # Follow the declarator chain (pointer, function, ...) down to the identifier
+            decl = node.child_by_field_name("declarator")
+            while decl is not None and decl.type != "identifier":
+                decl = decl.child_by_field_name("declarator")
+            if decl is not None:
+                return source_bytes[decl.start_byte:decl.end_byte].decode("utf-8", "ignore")
         
-        elif node_type == "enum_specifier":
-            # enum name { ... } or enum name;
-            match = re.search(r'enum\s+(\w+)', code)
-            if match:
-                return match.group(1)
-        
-        elif node_type == "union_specifier":
-            # union name { ... } or union name;
-            match = re.search(r'union\s+(\w+)', code)
-            if match:
-                return match.group(1)
-        
-        elif node_type == "type_definition":
-            # typedef ... name;
-            match = re.search(r'typedef\s+(?:.*?)\s+(\w+)\s*;', code)
-            if match:
-                return match.group(1)
-        
-        elif node_type == "preproc_def":
-            # #define NAME value
-            match = re.search(r'#define\s+(\w+)', code)
-            if match:
-                return match.group(1)
-        
-        elif node_type == "preproc_function_def":
-            # #define NAME(params) value
-            match = re.search(r'#define\s+(\w+)\s*\(', code)
-            if match:
-                return match.group(1)
-        
-        return None
-    
-    def _find_parent_directive(self, node, source_bytes) -> Optional[str]:
-        """Find the parent conditional directive if any."""
-        parent = node.parent
-        while parent:
-            if parent.type in {"preproc_ifdef", "preproc_ifndef", "preproc_if"}:
-                # Extract the condition from the directive
-                condition_node = parent.child_by_field_name("condition")
-                if condition_node:
-                    return source_bytes[condition_node.start_byte:condition_node.end_byte].decode("utf-8", "ignore")
-            parent = parent.parent
-        return None
+        # Fall back to a regex over the source text
+        regex = _NAME_RE.get(node_type)
+        # Only declarations with a parameter list are function prototypes
+        if regex is None or (node_type == "declaration" and "(" not in code):
+            return None
+        match = regex.search(code)
+        return match.group(1) if match else None
     
     def parse_file(self, filepath: str) -> List[ASTNode]:
         """Parse a C header file and extract AST nodes."""
@@ -227,71 +300,130 @@ class EmbeddedCParser:
         if not path.exists():
             raise FileNotFoundError(f"File not found: {filepath}")
         
-        source = path.read_text(encoding="utf-8", errors="ignore")
-        return self.parse_source(source, filepath)
+        return self.parse_source_bytes(_read_source(path), filepath)
     
     def parse_source(self, source: str, filepath: Optional[str] = None) -> List[ASTNode]:
         """Parse C source code and extract AST nodes."""
-        source_bytes = source.encode("utf-8")
+        return self.parse_source_bytes(source.encode("utf-8"), filepath)
+    
+    def parse_source_bytes(self, source_bytes: bytes, filepath: Optional[str] = None) -> List[ASTNode]:
+        """
+        Parse UTF-8 encoded C source code and extract AST nodes.
+        
+        Results are kept in a per-process LRU cache keyed by source content and
+        parser options, backed by the on-disk cache when one is configured.
+        """
+        # The parser options change the comments attached to each node
+        h = hashlib.sha256(source_bytes)
+        h.update(f"|{self.include_comments}|{self.max_comment_gap}".encode())
+        key = h.hexdigest()
+        nodes = _PARSE_CACHE.get(key)
+        if nodes is None:
+            nodes = self.cache.get(key) if self.cache is not None else None
+            if nodes is None:
+                nodes = self._parse_source(source_bytes)
+                if self.cache is not None:
+                    self.cache.put(key, nodes)
+            _PARSE_CACHE[key] = nodes
+            if len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+                _PARSE_CACHE.popitem(last=False)
+        else:
+            _PARSE_CACHE.move_to_end(key)
+        
+        # Callers may sort the list; the nodes themselves are shared
+        return list(nodes)
+    
+    def _parse_source(self, source_bytes: bytes) -> List[ASTNode]:
+        """Parse C source code into AST nodes, bypassing the cache."""
         tree = self.parser.parse(source_bytes)
         root = tree.root_node
-        line_offsets = _line_offsets(source)
+        line_offsets = _line_offsets(source_bytes)
+        
+        # Scan for comments once; each node then looks up its nearest one. The
+        # two scans can't share one alternation: a Doxygen block can sit inside a
+        # line comment, and "/**/" ends differently under the two patterns. Files
+        # without the opening literals skip the regex altogether.
+        doxygen_blocks = []
+        if b"/**" in source_bytes:
+            doxygen_blocks = _comment_blocks(source_bytes, DOXYGEN_COMMENT, line_offsets)
+        comment_blocks = []
+        if self.include_comments and (b"/*" in source_bytes or b"//" in source_bytes):
+            comment_blocks = _comment_blocks(source_bytes, C_COMMENT, line_offsets)
+        doxygen_end_lines = [ln for ln, _ in doxygen_blocks]
+        comment_end_lines = [ln for ln, _ in comment_blocks]
         
         nodes = []
+        # Target nodes nest (an include guard spans the whole file), so decode
+        # their text straight from a view instead of copying each byte slice first
+        source_view = memoryview(source_bytes)
         
-        def visit(node, parent_directive=None):
-            if node.type in self.TARGET_TYPES:
-                code = source_bytes[node.start_byte:node.end_byte].decode("utf-8", "ignore")
-                start_line = _byte_to_line(node.start_byte, line_offsets)
-                end_line = _byte_to_line(node.end_byte, line_offsets)
-                
-                # Skip empty or very short nodes
-                if len(code.strip()) < 3:
-                    return
+        # Pre-order walk with a tree cursor; directives[-1] is the enclosing
+        # directive condition passed down to the node under the cursor
+        cursor = root.walk()
+        directives = [None]
+        # Most visited nodes are not targets; bind what the loop touches per node
+        target_types = self.TARGET_TYPES
+        goto_first_child = cursor.goto_first_child
+        goto_next_sibling = cursor.goto_next_sibling
+        goto_parent = cursor.goto_parent
+        while True:
+            node = cursor.node
+            parent_directive = directives[-1]
+            descend = True
+            if node.type in target_types:
+                code = str(source_view[node.start_byte:node.end_byte], "utf-8", "ignore")
                 
-                # Find the nearest Doxygen comment
-                doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-                if doxygen:
-                    doxygen = _parse_doxygen_comment(doxygen)
+                # Skip empty or very short nodes, along with everything inside them
+                descend = len(code.strip()) >= 3
+                if descend:
+                    start_line = _byte_to_line(node.start_byte, line_offsets)
+                    end_line = _byte_to_line(node.end_byte, line_offsets)
+                    
+                    # Find the nearest Doxygen comment
+                    doxygen = _find_nearest_comment(doxygen_blocks, doxygen_end_lines, start_line, self.max_comment_gap)
+                    if doxygen:
+                        doxygen = _parse_doxygen_comment(doxygen)
                 
-                # Find regular comments if enabled
-                comments = []
-                if self.include_comments:
-                    comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                    if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                        comments.append(comment)
+                    # Find regular comments if enabled
+                    comments = []
+                    if self.include_comments:
+                        comment = _find_nearest_comment(comment_blocks, comment_end_lines, start_line, self.max_comment_gap)
+                        if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
+                            comments.append(comment)
                 
-                # Extract name if possible
-                name = self._extract_name(node.type, code)
+                    # Extract name if possible
+                    name = self._extract_name(node, source_bytes, code)
                 
-                # Find parent directive if any
-                parent = self._find_parent_directive(node, source_bytes) or parent_directive
+                    # The innermost enclosing directive condition, carried down by the walk
+                    parent = parent_directive
                 
-                ast_node = ASTNode(
-                    type=node.type,
-                    code=code,
-                    start_line=start_line,
-                    end_line=end_line,
-                    name=name,
-                    parent=parent,
-                    doxygen=doxygen,
-                    comments=comments
-                )
+                    ast_node = ASTNode(
+                        type=sys.intern(node.type),
+                        code=code,
+                        start_line=start_line,
+                        end_line=end_line,
+                        name=name,
+                        parent=parent,
+                        doxygen=doxygen,
+                        comments=comments
+                    )
                 
-                nodes.append(ast_node)
+                    nodes.append(ast_node)
                 
-                # For conditional directives, pass the condition to children
-                if node.type in {"preproc_ifdef", "preproc_ifndef", "preproc_if"}:
-                    condition_node = node.child_by_field_name("condition")
-                    if condition_node:
-                        parent_directive = source_bytes[condition_node.start_byte:condition_node.end_byte].decode("utf-8", "ignore")
+                    # For conditional directives, pass the condition to children
+                    if node.type in {"preproc_ifdef", "preproc_ifndef", "preproc_if"}:
+                        condition_node = node.child_by_field_name("condition")
+                        if condition_node:
+                            parent_directive = sys.intern(source_bytes[condition_node.start_byte:condition_node.end_byte].decode("utf-8", "ignore"))
             
-            # Visit children
-            for child in node.children:
-                visit(child, parent_directive)
-        
-        visit(root)
-        return nodes
+            # Move to the next node: first child, else next sibling, else climb up
+            if descend and goto_first_child():
+                directives.append(parent_directive)
+                continue
+            while not goto_next_sibling():
+                if not goto_parent():
+                    return nodes
+                directives.pop()
 
 class CChunker:
     """
@@ -305,7 +437,8 @@ class CChunker:
     """
     
     def __init__(self, max_chunk_size: int = 1600, chunk_overlap_units: int = 1, 
-                 one_symbol_per_chunk: bool = False, include_comments: bool = True):
+                 one_symbol_per_chunk: bool = False, include_comments: bool = True,
+                 parse_cache: Optional[ParseCache] = None):
         """
         Initialize the chunker.
         
@@ -314,24 +447,28 @@ class CChunker:
             chunk_overlap_units: Number of units to overlap between chunks
             one_symbol_per_chunk: Whether to create one chunk per symbol
             include_comments: Whether to include regular comments
+            parse_cache: Optional on-disk cache of parse results
         """
-        self.parser = EmbeddedCParser(include_comments=include_comments)
+        self.parser = EmbeddedCParser(include_comments=include_comments, cache=parse_cache)
         self.max_chunk_size = max_chunk_size
         self.overlap_units = chunk_overlap_units
         self.one_symbol_per_chunk = one_symbol_per_chunk
     
-    def chunkify(self, code: str, filepath: Optional[str] = None) -> List[Dict]:
+    def chunkify(self, code: Union[str, bytes], filepath: Optional[str] = None) -> List[Dict]:
         """
         Chunk the given code into semantic units.
         
         Args:
-            code: The source code to chunk
+            code: The source code to chunk, as text or UTF-8 bytes
             filepath: Optional filepath for metadata
             
         Returns:
             List of chunks, each containing content and metadata
         """
-        nodes = self.parser.parse_source(code, filepath)
+        if isinstance(code, bytes):
+            nodes = self.parser.parse_source_bytes(code, filepath)
+        else:
+            nodes = self.parser.parse_source(code, filepath)
         
         # Sort nodes by line number
         nodes.sort(key=lambda n: n.start_line)
@@ -418,7 +555,7 @@ class CChunker:
         
         metadata = {
             "language": "c",
-            "filepath": filepath or "",
+            "filepath": sys.intern(filepath or ""),
             "chunk_units": [
                 {
                     "type": n.type,
@@ -436,16 +573,103 @@ class CChunker:
             "metadata": metadata
         }
 
-def _iter_header_files(paths):
-    """Iterate over all header files in the given paths."""
-    for p in paths:
-        p = pathlib.Path(p)
-        if p.is_file() and p.suffix.lower() in (".h", ".hpp"):
-            yield p
-        elif p.is_dir():
-            for f in p.rglob("*"):
-                if f.is_file() and f.suffix.lower() in (".h", ".hpp"):
-                    yield f
+class ChunkManifest:
+    """
+    Record of chunked headers for incremental CLI runs.
+    
+    Maps each header path to its mtime, content hash and the file holding the
+    chunks it produced, so unchanged headers are neither read nor parsed again.
+    Entries written under other chunking options are ignored.
+    """
+    
+    def __init__(self, cache_dir: str, options: List[Any]):
+        self.path = pathlib.Path(cache_dir) / "manifest.json"
+        self.chunk_dir = pathlib.Path(cache_dir) / "chunks"
+        self.options = list(options)
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+        self.stale = []
+        self.dirty = False
+    
+    def lookup(self, path: str, mtime_ns: int, sha: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Return the cached chunks for path, or None if it has to be chunked again.
+        
+        Without sha the entry must match on mtime; with sha a matching content
+        hash is enough (the file was touched but not changed).
+        """
+        entry = self.entries.get(path)
+        if not entry or entry.get("options") != self.options:
+            return None
+        if (entry["mtime"] != mtime_ns) if sha is None else (entry["sha"] != sha):
+            return None
+        try:
+            with open(self.chunk_dir / entry["chunks"], "rb") as f:
+                chunks = [json.loads(line) for line in f]
+        except (OSError, ValueError):
+            return None
+        if entry["mtime"] != mtime_ns:
+            entry["mtime"] = mtime_ns
+            self.dirty = True
+        return chunks
+    
+    def store(self, path: str, mtime_ns: int, sha: str, chunks: List[Dict]) -> None:
+        """Write the chunks for path and record them in the manifest."""
+        name = _sha(path, sha, *self.options) + ".jsonl"
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.chunk_dir / (name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"".join(_dumps(chunk) + b"\n" for chunk in chunks))
+        os.replace(tmp, self.chunk_dir / name)
+        
+        old = self.entries.get(path)
+        if old and old["chunks"] != name:
+            self.stale.append(old["chunks"])
+        self.entries[path] = {"mtime": mtime_ns, "sha": sha, "options": self.options, "chunks": name}
+        self.dirty = True
+    
+    def save(self) -> None:
+        """Atomically replace the manifest, then drop chunk files it no longer references."""
+        if not self.dirty:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries), encoding="utf-8")
+        os.replace(tmp, self.path)
+        live = {entry["chunks"] for entry in self.entries.values()}
+        for name in self.stale:
+            if name not in live:
+                (self.chunk_dir / name).unlink(missing_ok=True)
+        self.stale, self.dirty = [], False
+
+# tree-sitter parsers don't pickle, so each worker process builds its own chunker
+_chunker = None
+_hash_sources = False
+
+def _init_worker(chunker_options: Dict[str, Any], cache_dir: Optional[str]):
+    global _chunker, _hash_sources
+    parse_cache = ParseCache(str(pathlib.Path(cache_dir) / "parse.sqlite")) if cache_dir else None
+    _chunker = CChunker(**chunker_options, parse_cache=parse_cache)
+    _hash_sources = cache_dir is not None
+
+def _process_one(task: Tuple[pathlib.Path, Optional[str]]) -> Tuple[Optional[str], Optional[List[Dict]]]:
+    """
+    Chunk one header in a worker process.
+    
+    Returns (sha, chunks). When the content hash equals prev_sha, chunks is None
+    and the caller reuses its cached chunks; on errors both are None.
+    """
+    path, prev_sha = task
+    try:
+        source = _read_source(path)
+        sha = hashlib.sha1(source).hexdigest() if _hash_sources else None
+        if sha is not None and sha == prev_sha:
+            return sha, None
+        return sha, _chunker.chunkify(source, filepath=str(path))
+    except Exception as e:
+        print(f"Error processing {path}: {e}", file=sys.stderr)
+        return None, None
 
 def main():
     """Command-line interface for the chunker."""
@@ -456,32 +680,62 @@ def main():
     ap.add_argument("--one-per-symbol", action="store_true", help="Emit one chunk per AST unit")
     ap.add_argument("--no-comments", action="store_true", help="Exclude regular comments")
     ap.add_argument("--output", "-o", help="Output file (default: stdout)")
+    ap.add_argument("--cache-dir", help="Directory for the on-disk parse cache and chunk manifest (e.g. .astcache)")
     args = ap.parse_args()
     
-    chunker = CChunker(
-        max_chunk_size=args.max_chars,
-        chunk_overlap_units=args.overlap,
-        one_symbol_per_chunk=args.one_per_symbol,
-        include_comments=not args.no_comments
-    )
+    chunker_options = {
+        "max_chunk_size": args.max_chars,
+        "chunk_overlap_units": args.overlap,
+        "one_symbol_per_chunk": args.one_per_symbol,
+        "include_comments": not args.no_comments,
+    }
+    manifest = None
+    if args.cache_dir:
+        options = [args.max_chars, args.overlap, args.one_per_symbol, args.no_comments,
+                   _grammar_version(), CACHE_SCHEMA_VERSION]
+        manifest = ChunkManifest(args.cache_dir, options)
     
-    chunks = []
+    # Headers whose mtime matches the manifest are served from it without being
+    # read; the rest are chunked in worker processes
+    files = []  # (path, mtime_ns, cached chunks or None)
     for path in _iter_header_files(args.inputs):
         try:
-            source = pathlib.Path(path).read_text(encoding="utf-8", errors="ignore")
-            file_chunks = chunker.chunkify(source, filepath=str(path))
-            chunks.extend(file_chunks)
-        except Exception as e:
+            mtime_ns = path.stat().st_mtime_ns if manifest else None
+        except OSError as e:
             print(f"Error processing {path}: {e}", file=sys.stderr)
+            continue
+        cached = manifest.lookup(str(path), mtime_ns) if manifest else None
+        files.append((path, mtime_ns, cached))
+    
+    def prev_sha(path):
+        entry = manifest.entries.get(str(path)) if manifest else None
+        return entry["sha"] if entry else None
     
-    # Output the chunks
-    if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            for chunk in chunks:
-                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
-    else:
-        for chunk in chunks:
-            print(json.dumps(chunk, ensure_ascii=False))
+    tasks = [(path, prev_sha(path)) for path, _, cached in files if cached is None]
+    with contextlib.ExitStack() as stack:
+        out = stack.enter_context(open(args.output, "wb")) if args.output else sys.stdout.buffer
+        ex = stack.enter_context(ProcessPoolExecutor(initializer=_init_worker, initargs=(chunker_options, args.cache_dir)))
+        # map() keeps results in input order, so output matches a sequential run
+        results = ex.map(_process_one, tasks, chunksize=8)
+        for path, mtime_ns, file_chunks in files:
+            if file_chunks is None:
+                sha, file_chunks = next(results)
+                if file_chunks is None and sha is not None:
+                    # Touched but unchanged: reuse the stored chunks, or chunk the
+                    # file after all if they went missing
+                    file_chunks = manifest.lookup(str(path), mtime_ns, sha)
+                    if file_chunks is None:
+                        sha, file_chunks = ex.submit(_process_one, (path, None)).result()
+                        if file_chunks is not None:
+                            manifest.store(str(path), mtime_ns, sha, file_chunks)
+                elif file_chunks is not None and manifest is not None:
+                    manifest.store(str(path), mtime_ns, sha, file_chunks)
+                if file_chunks is None:
+                    continue
+            # Stream each file's chunks as soon as they are ready, one write per file
+            out.write(b"".join(_dumps(chunk) + b"\n" for chunk in file_chunks))
+    if manifest is not None:
+        manifest.save()
 
 if __name__ == "__main__":
     main()
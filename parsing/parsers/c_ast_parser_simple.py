@@ -1,58 +1,147 @@
+import os
 import re
 import json
+import bisect
+import heapq
 import hashlib
 import sys
 import pathlib
 import argparse
+import queue
+import threading
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from itertools import accumulate
 from typing import Dict, List, Optional, Set, Tuple, Any, Iterator
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, is_dataclass
 
-# Regex for Doxygen comments (both /*! */ and /** */ styles)
-DOXYGEN_COMMENT = re.compile(r"/\*\*!(?:.|\n)*?\*/|/\*\*(?:.|\n)*?\*/", re.MULTILINE)
+# Prefer orjson for JSONL output (C encoder, emits UTF-8 bytes); fall back to json
+try:
+    import orjson   # pip: orjson
+except ImportError:
+    orjson = None
+
+# Regex for Doxygen comments (both /*! */ and /** */ styles); [\s\S] matches any
+# character in one step, where (?:.|\n) backtracks through an alternation per character
+DOXYGEN_COMMENT = re.compile(r"/\*\*!?[\s\S]*?\*/")
 # Regular C comments (both block and line)
-C_COMMENT = re.compile(r"/\*(?:.|\n)*?\*/|//.*?$", re.MULTILINE)
+C_COMMENT = re.compile(r"/\*[\s\S]*?\*/|//[^\n]*")
+# Comment cleanup and Doxygen tag patterns
+_COMMENT_STRIP = re.compile(r"^/\*\*!?|\*/$|^//")
+_STAR_PREFIX = re.compile(r"^\s*\* ?")
+_DOX_TAG = re.compile(r"@(\w+)\s*(.*)")
+# Name and enum value patterns used while building nodes
+_EXTERN_FUNC_NAME = re.compile(r'extern\s+\w+\s+(\w+)\s*\(')
+_FUNC_NAME = re.compile(r'[^a-zA-Z0-9_](\w+)\s*\([^;]*\);')
+_ENUM_BODY = re.compile(r'\{([^}]*)\}')
+_ENUM_FIRST_VALUE = re.compile(r'(\w+)\s*(?:=|,|$)')
+
+# Node dataclasses are slotted (no per-instance __dict__) where dataclass supports
+# it, which is Python 3.10+; older versions get plain dataclasses
+_NODE_DATACLASS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Number of parse results kept by RegexBasedCParser.parse_source
+PARSE_CACHE_SIZE = 64
+# Recently parsed sources, shared by all parser instances (least recently used first)
+_PARSE_CACHE: "OrderedDict[tuple, List[ASTNode]]" = OrderedDict()
 
 def _sha(*xs) -> str:
-    """Generate a short SHA hash from the inputs."""
-    return hashlib.sha1("|".join(map(str, xs)).encode()).hexdigest()[:16]
+    """Generate a short hash from the inputs."""
+    # ids only need to be stable, not cryptographic; an 8-byte blake2b digest is 16 hex chars
+    return hashlib.blake2b("|".join(map(str, xs)).encode(), digest_size=8).hexdigest()
+
+def _as_json(obj):
+    """json.dumps hook for the dataclasses orjson serializes natively."""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps(obj) -> bytes:
+    """Serialize an object (dataclasses included) to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_as_json).encode("utf-8")
 
 def _line_offsets(s: str) -> List[int]:
     """Calculate byte offsets for each line in the source."""
-    offs, acc = [0], 0
-    for ln in s.splitlines(True):
-        acc += len(ln)
-        offs.append(acc)
-    return offs
+    # Running sum of line lengths, computed without a Python-level loop
+    return list(accumulate(map(len, s.splitlines(True)), initial=0))
+
+def _newline_starts(source: str) -> List[int]:
+    """Offsets at which each line starts, counting only '\\n' as a line break."""
+    starts = [0]
+    idx = source.find('\n')
+    while idx != -1:
+        starts.append(idx + 1)
+        idx = source.find('\n', idx + 1)
+    return starts
+
+# Line breaks str.splitlines() honours besides "\n"
+_OTHER_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+def _line_tables(source: str) -> Tuple[List[int], List[int]]:
+    """
+    Return (_newline_starts(source), _line_offsets(source)) from one scan of the source.
+    
+    When "\n" is the only line break in the source, the two tables differ at most in
+    the end offset of an unterminated last line, so the second is derived from the first.
+    """
+    offs = _line_offsets(source)
+    if any(c in source for c in _OTHER_BREAKS):
+        return _newline_starts(source), offs
+    return (offs[:-1] if source and not source.endswith("\n") else offs), offs
 
 def _byte_to_line(b: int, offs: List[int]) -> int:
     """Convert byte offset to line number."""
-    import bisect
     return bisect.bisect_right(offs, b) - 1
 
-def _find_nearest_comment(src: str, start_line: int, regex, max_gap: int = 5) -> Optional[Dict]:
-    """Find the nearest comment above the given line."""
-    blocks = [(m.start(), m.end(), m.group(0)) for m in regex.finditer(src)]
-    offs = _line_offsets(src)
-    best, gap = None, max_gap + 1
-    
-    for b0, b1, raw in blocks:
-        end_ln = _byte_to_line(b1, offs)
-        if 0 <= (start_line - end_ln) < gap:
-            best, gap = raw, start_line - end_ln
-            
-    if not best:
-        return None
-        
-    # Clean up the comment
-    body = re.sub(r"^/\*\*!?|\*/$|^//", "", best.strip())
-    body = "\n".join(re.sub(r"^\s*\* ?", "", ln) for ln in body.splitlines())
+def _comment_blocks(src: str, regex, offs: List[int]) -> List[Tuple[int, str]]:
+    """Find all comments matching regex as (end_line, raw) pairs, in source order."""
+    return [(_byte_to_line(m.end(), offs), m.group(0)) for m in regex.finditer(src)]
+
+def _comment_entry(raw: str, gap: int) -> Dict:
+    """Clean up a raw comment into its associated-comment entry."""
+    body = _COMMENT_STRIP.sub("", raw.strip())
+    body = "\n".join(_STAR_PREFIX.sub("", ln) for ln in body.splitlines())
     
     return {
-        "raw": best,
+        "raw": raw,
         "text": body.strip() or None,
         "line_gap": gap
     }
 
+class _CommentCursor:
+    """
+    Finds the nearest comment above each node, for nodes visited in line order.
+    
+    The nearest comment is the first of those ending on the last line at or above
+    the node's start line, if that is at most max_gap lines above it. Since start
+    lines never decrease the cursor only moves forward: one pass over the comments
+    in total.
+    """
+    __slots__ = ("blocks", "max_gap", "pos", "first")
+    
+    def __init__(self, blocks: List[Tuple[int, str]], max_gap: int = 5):
+        self.blocks = blocks
+        self.max_gap = max_gap
+        self.pos = 0    # number of blocks ending at or above the last line asked for
+        self.first = 0  # first of the blocks ending on the same line as blocks[pos - 1]
+    
+    def nearest(self, start_line: int) -> Optional[Dict]:
+        blocks, pos, first = self.blocks, self.pos, self.first
+        while pos < len(blocks) and blocks[pos][0] <= start_line:
+            if not pos or blocks[pos][0] != blocks[pos - 1][0]:
+                first = pos
+            pos += 1
+        self.pos, self.first = pos, first
+        if not pos:
+            return None
+        gap = start_line - blocks[first][0]
+        if gap > self.max_gap:
+            return None
+        return _comment_entry(blocks[first][1], gap)
+
 def _parse_doxygen_comment(comment: Dict) -> Dict:
     """Parse a Doxygen comment into structured data."""
     if not comment or not comment.get("text"):
@@ -62,7 +151,7 @@ def _parse_doxygen_comment(comment: Dict) -> Dict:
     tags, free = {}, []
     
     for ln in body.splitlines():
-        m = re.match(r"@(\w+)\s*(.*)", ln)
+        m = _DOX_TAG.match(ln)
         if m:
             tags.setdefault(m.group(1).lower(), []).append(m.group(2))
         else:
@@ -80,7 +169,7 @@ def _parse_doxygen_comment(comment: Dict) -> Dict:
         "line_gap": comment.get("line_gap")
     }
 
-@dataclass
+@dataclass(**_NODE_DATACLASS)
 class ASTNode:
     """Represents a node in the AST."""
     type: str
@@ -121,8 +210,10 @@ class RegexBasedCParser:
     
     # Regex patterns for different C constructs
     PATTERNS = {
-        "function_definition": re.compile(r"(?:static\s+)?(?:\w+\s+)+(\w+)\s*\([^;]*\)\s*\{", re.MULTILINE),
-        "function_declaration": re.compile(r"(?:extern\s+)?(?:\w+\s+)+([\w_]+)\s*\([^;]*\);", re.MULTILINE),
+        # Function patterns start at a word boundary: a match can only begin where a
+        # word does, and retrying from every character inside a word is the costly part
+        "function_definition": re.compile(r"\b(?:static\s+)?(?:\w+\s+)+(\w+)\s*\([^;]*\)\s*\{", re.MULTILINE),
+        "function_declaration": re.compile(r"\b(?:extern\s+)?(?:\w+\s+)+([\w_]+)\s*\([^;]*\);", re.MULTILINE),
         "struct_specifier": re.compile(r"struct\s+(\w+)(?:\s*\{[^}]*\}|\s*;)", re.MULTILINE | re.DOTALL),
         "enum_specifier": re.compile(r"enum\s+(\w+)(?:\s*\{[^}]*\}|\s*;)", re.MULTILINE | re.DOTALL),
         "union_specifier": re.compile(r"union\s+(\w+)(?:\s*\{[^}]*\}|\s*;)", re.MULTILINE | re.DOTALL),
@@ -156,367 +247,344 @@ class RegexBasedCParser:
         if start_idx >= len(source) or source[start_idx] != '{':
             return "", start_idx
             
+        # Jump between braces with str.find instead of stepping through every character
         depth = 1
         end_idx = start_idx + 1
+        next_open = source.find('{', end_idx)
         
-        while end_idx < len(source) and depth > 0:
-            if source[end_idx] == '{':
+        while depth > 0:
+            close = source.find('}', end_idx)
+            if close == -1:
+                end_idx = len(source)
+                break
+            # Every '{' before this '}' opens a nested block first
+            while next_open != -1 and next_open < close:
                 depth += 1
-            elif source[end_idx] == '}':
-                depth -= 1
-            end_idx += 1
+                next_open = source.find('{', next_open + 1)
+            depth -= 1
+            end_idx = close + 1
             
         return source[start_idx:end_idx], end_idx
     
-    def _find_line_number(self, source: str, index: int) -> int:
-        """Find the line number for a given index in the source."""
-        return source[:index].count('\n') + 1
-    
     def parse_file(self, filepath: str) -> List[ASTNode]:
         """Parse a C header file and extract nodes."""
         path = pathlib.Path(filepath)
         if not path.exists():
             raise FileNotFoundError(f"File not found: {filepath}")
         
-        source = path.read_text(encoding="utf-8", errors="ignore")
-        return self.parse_source(source, filepath)
+        return self.parse_source(_read_text(path), filepath)
     
     def parse_source(self, source: str, filepath: Optional[str] = None) -> List[ASTNode]:
-        """Parse C source code and extract nodes."""
-        nodes = []
+        """
+        Parse C source code and extract nodes.
+        
+        Results are cached per source and parser options, so the CAST and enhanced
+        parsers, which start from this result, don't redo the regex passes for a
+        source they have seen. The shared pattern table is part of the key because
+        subclasses update it.
+        """
+        key = (_sha(source), self.include_comments, self.max_comment_gap,
+               tuple(self.PATTERNS.values()))
+        nodes = _PARSE_CACHE.get(key)
+        if nodes is None:
+            nodes = list(self.iter_nodes(source, filepath))
+            _PARSE_CACHE[key] = nodes
+            if len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+                _PARSE_CACHE.popitem(last=False)
+        else:
+            _PARSE_CACHE.move_to_end(key)
+        
+        # Callers may reorder or filter the list; the nodes themselves are shared
+        return list(nodes)
+    
+    def iter_nodes(self, source: str, filepath: Optional[str] = None) -> Iterator[ASTNode]:
+        """Yield the nodes of C source code in line order as they are produced."""
+        
+        # Constructs keep one pass each, since their patterns overlap (typedef_struct
+        # and typedef_anon_struct match the same text) and one alternation would drop
+        # matches; a pass is skipped when the source lacks a literal its pattern needs
+        def scan(pattern_name, literal):
+            return self.PATTERNS[pattern_name].finditer(source) if literal in source else ()
+        
+        # 1-based line of a source index, i.e. the number of newlines before it plus one;
+        # comment lines below use the splitlines() offsets, built in the same scan
+        line_starts, offs = _line_tables(source)
+        line_of = lambda idx: bisect.bisect_right(line_starts, idx)
+        
+        # Scan for comments once, as (end_line, raw) lists in source order
+        doxygen_blocks = _comment_blocks(source, DOXYGEN_COMMENT, offs)
+        comment_blocks = _comment_blocks(source, C_COMMENT, offs) if self.include_comments else []
         
         # Find all conditional directives first to establish context
-        conditional_contexts = {}
-        for match in self.PATTERNS["conditional_directive"].finditer(source):
+        cond_starts, cond_ends, conditions = [], [], []
+        for match in scan("conditional_directive", "#if"):
             start_idx = match.start()
             condition = match.group(1).strip()
-            start_line = self._find_line_number(source, start_idx)
+            start_line = line_of(start_idx)
             
             # Find the end of this conditional block (approximate)
-            end_match = re.search(r"#endif", source[start_idx:])
-            if end_match:
-                end_idx = start_idx + end_match.end()
-                end_line = self._find_line_number(source, end_idx)
+            end_pos = source.find("#endif", start_idx)
+            if end_pos != -1:
+                end_line = line_of(end_pos + len("#endif"))
                 
-                # Mark all lines in this range as being in this conditional context
-                for line in range(start_line, end_line + 1):
-                    conditional_contexts[line] = condition
+                # Record the line range this conditional context covers
+                cond_starts.append(start_line)
+                cond_ends.append(end_line)
+                conditions.append(condition)
+        
+        # Each block ends at the first #endif after it, so both starts and ends are
+        # sorted and the last block starting at or above a line is the only candidate;
+        # where blocks overlap, the later one wins
+        def conditional_block(line):
+            i = bisect.bisect_right(cond_starts, line) - 1
+            return i if i >= 0 and cond_ends[i] >= line else -1
+        
+        def conditional_context(line):
+            i = conditional_block(line)
+            return conditions[i] if i >= 0 else None
         
         # Process function definitions
-        for match in self.PATTERNS["function_definition"].finditer(source):
-            start_idx = match.start()
-            name = match.group(1)
-            start_line = self._find_line_number(source, start_idx)
-            
-            # Find the end of the function body
-            body_start = source.find('{', start_idx)
-            if body_start != -1:
-                body, end_idx = self._extract_balanced_block(source, body_start)
-                end_line = self._find_line_number(source, end_idx)
+        def function_definitions():
+            for match in scan("function_definition", "{"):
+                start_idx = match.start()
+                name = match.group(1)
+                start_line = line_of(start_idx)
+                
+                # Find the end of the function body
+                body_start = source.find('{', start_idx)
+                if body_start != -1:
+                    body, end_idx = self._extract_balanced_block(source, body_start)
+                    end_line = line_of(end_idx)
+                    
+                    code = source[start_idx:end_idx]
+                    
+                    # Find conditional context: the one at the first covered line of the
+                    # function, which is its start line or else the next block's start
+                    i = conditional_block(start_line)
+                    if i < 0:
+                        j = bisect.bisect_right(cond_starts, start_line)
+                        if j < len(cond_starts) and cond_starts[j] <= end_line:
+                            i = conditional_block(cond_starts[j])
+                    parent = conditions[i] if i >= 0 else None
+                    
+                    yield ASTNode(
+                        type="function_definition",
+                        code=code,
+                        start_line=start_line,
+                        end_line=end_line,
+                        name=name,
+                        parent=parent
+                    )
+        
+        # Process function declarations
+        def function_declarations():
+            for match in scan("function_declaration", ");"):
+                start_idx = match.start()
+                name = match.group(1)
+                end_idx = match.end()
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
                 
                 code = source[start_idx:end_idx]
                 
-                # Find associated comments
-                doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-                if doxygen:
-                    doxygen = _parse_doxygen_comment(doxygen)
+                # Extract the actual function name from the declaration
+                # This handles cases where the name might be incorrectly extracted from comments
+                # Look for function name pattern in extern declarations
+                func_name_match = _EXTERN_FUNC_NAME.search(code)
+                if not func_name_match:
+                    # Try a more general pattern
+                    func_name_match = _FUNC_NAME.search(code)
                 
-                comments = []
-                if self.include_comments:
-                    comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                    if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                        comments.append(comment)
+                if func_name_match:
+                    name = func_name_match.group(1)
                 
                 # Find conditional context
-                parent = None
-                for line in range(start_line, end_line + 1):
-                    if line in conditional_contexts:
-                        parent = conditional_contexts[line]
-                        break
+                parent = conditional_context(start_line)
                 
-                nodes.append(ASTNode(
-                    type="function_definition",
+                yield ASTNode(
+                    type="declaration",
                     code=code,
                     start_line=start_line,
                     end_line=end_line,
                     name=name,
-                    parent=parent,
-                    doxygen=doxygen,
-                    comments=comments
-                ))
-        
-        # Process function declarations
-        for match in self.PATTERNS["function_declaration"].finditer(source):
-            start_idx = match.start()
-            name = match.group(1)
-            end_idx = match.end()
-            start_line = self._find_line_number(source, start_idx)
-            end_line = self._find_line_number(source, end_idx)
-            
-            code = source[start_idx:end_idx]
-            
-            # Extract the actual function name from the declaration
-            # This handles cases where the name might be incorrectly extracted from comments
-            # Look for function name pattern in extern declarations
-            func_name_match = re.search(r'extern\s+\w+\s+(\w+)\s*\(', code)
-            if not func_name_match:
-                # Try a more general pattern
-                func_name_match = re.search(r'[^a-zA-Z0-9_](\w+)\s*\([^;]*\);', code)
-            
-            if func_name_match:
-                name = func_name_match.group(1)
-            
-            # Find associated comments
-            doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-            if doxygen:
-                doxygen = _parse_doxygen_comment(doxygen)
-            
-            comments = []
-            if self.include_comments:
-                comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                    comments.append(comment)
-            
-            # Find conditional context
-            parent = conditional_contexts.get(start_line)
-            
-            nodes.append(ASTNode(
-                type="declaration",
-                code=code,
-                start_line=start_line,
-                end_line=end_line,
-                name=name,
-                parent=parent,
-                doxygen=doxygen,
-                comments=comments
-            ))
+                    parent=parent
+                )
         
         # Process struct definitions
-        for match in self.PATTERNS["struct_specifier"].finditer(source):
-            start_idx = match.start()
-            name = match.group(1)
-            end_idx = match.end()
-            start_line = self._find_line_number(source, start_idx)
-            end_line = self._find_line_number(source, end_idx)
-            
-            code = source[start_idx:end_idx]
-            
-            # Find associated comments
-            doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-            if doxygen:
-                doxygen = _parse_doxygen_comment(doxygen)
-            
-            comments = []
-            if self.include_comments:
-                comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                    comments.append(comment)
-            
-            # Find conditional context
-            parent = conditional_contexts.get(start_line)
-            
-            nodes.append(ASTNode(
-                type="struct_specifier",
-                code=code,
-                start_line=start_line,
-                end_line=end_line,
-                name=name,
-                parent=parent,
-                doxygen=doxygen,
-                comments=comments
-            ))
+        def struct_specifiers():
+            for match in scan("struct_specifier", "struct"):
+                start_idx = match.start()
+                name = match.group(1)
+                end_idx = match.end()
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
+                
+                code = source[start_idx:end_idx]
+                
+                # Find conditional context
+                parent = conditional_context(start_line)
+                
+                yield ASTNode(
+                    type="struct_specifier",
+                    code=code,
+                    start_line=start_line,
+                    end_line=end_line,
+                    name=name,
+                    parent=parent
+                )
         
         # Process enum definitions
-        for match in self.PATTERNS["enum_specifier"].finditer(source):
-            start_idx = match.start()
-            name = match.group(1)
-            end_idx = match.end()
-            start_line = self._find_line_number(source, start_idx)
-            end_line = self._find_line_number(source, end_idx)
-            
-            code = source[start_idx:end_idx]
-            
-            # Find associated comments
-            doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-            if doxygen:
-                doxygen = _parse_doxygen_comment(doxygen)
-            
-            comments = []
-            if self.include_comments:
-                comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                    comments.append(comment)
-            
-            # Find conditional context
-            parent = conditional_contexts.get(start_line)
-            
-            nodes.append(ASTNode(
-                type="enum_specifier",
-                code=code,
-                start_line=start_line,
-                end_line=end_line,
-                name=name,
-                parent=parent,
-                doxygen=doxygen,
-                comments=comments
-            ))
+        def enum_specifiers():
+            for match in scan("enum_specifier", "enum"):
+                start_idx = match.start()
+                name = match.group(1)
+                end_idx = match.end()
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
+                
+                code = source[start_idx:end_idx]
+                
+                # Find conditional context
+                parent = conditional_context(start_line)
+                
+                yield ASTNode(
+                    type="enum_specifier",
+                    code=code,
+                    start_line=start_line,
+                    end_line=end_line,
+                    name=name,
+                    parent=parent
+                )
         
         # Process regular enum definitions (not typedef enums)
-        for match in self.PATTERNS["enum_definition"].finditer(source):
-            start_idx = match.start()
-            end_idx = match.end()
-            start_line = self._find_line_number(source, start_idx)
-            end_line = self._find_line_number(source, end_idx)
-            
-            code = source[start_idx:end_idx]
-            
-            # Try to extract a name from the enum values
-            enum_name = "anonymous_enum"
-            enum_values_match = re.search(r'\{([^}]*)\}', code)
-            if enum_values_match:
-                enum_values = enum_values_match.group(1)
-                first_value_match = re.search(r'(\w+)\s*(?:=|,|$)', enum_values)
-                if first_value_match:
-                    enum_name = f"enum_with_{first_value_match.group(1)}"
-            
-            # Find associated comments
-            doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-            if doxygen:
-                doxygen = _parse_doxygen_comment(doxygen)
-            
-            comments = []
-            if self.include_comments:
-                comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                    comments.append(comment)
-            
-            # Find conditional context
-            parent = conditional_contexts.get(start_line)
-            
-            nodes.append(ASTNode(
-                type="enum_definition",
-                code=code,
-                start_line=start_line,
-                end_line=end_line,
-                name=enum_name,
-                parent=parent,
-                doxygen=doxygen,
-                comments=comments
-            ))
+        def enum_definitions():
+            for match in scan("enum_definition", "enum"):
+                start_idx = match.start()
+                end_idx = match.end()
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
+                
+                code = source[start_idx:end_idx]
+                
+                # Try to extract a name from the enum values
+                enum_name = "anonymous_enum"
+                enum_values_match = _ENUM_BODY.search(code)
+                if enum_values_match:
+                    enum_values = enum_values_match.group(1)
+                    first_value_match = _ENUM_FIRST_VALUE.search(enum_values)
+                    if first_value_match:
+                        enum_name = f"enum_with_{first_value_match.group(1)}"
+                
+                # Find conditional context
+                parent = conditional_context(start_line)
+                
+                yield ASTNode(
+                    type="enum_definition",
+                    code=code,
+                    start_line=start_line,
+                    end_line=end_line,
+                    name=enum_name,
+                    parent=parent
+                )
         
         # Process typedefs
-        for match in self.PATTERNS["typedef"].finditer(source):
-            start_idx = match.start()
-            name = match.group(1)
-            end_idx = match.end()
-            start_line = self._find_line_number(source, start_idx)
-            end_line = self._find_line_number(source, end_idx)
-            
-            code = source[start_idx:end_idx]
-            
-            # Find associated comments
-            doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-            if doxygen:
-                doxygen = _parse_doxygen_comment(doxygen)
-            
-            comments = []
-            if self.include_comments:
-                comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                    comments.append(comment)
-            
-            # Find conditional context
-            parent = conditional_contexts.get(start_line)
-            
-            nodes.append(ASTNode(
-                type="type_definition",
-                code=code,
-                start_line=start_line,
-                end_line=end_line,
-                name=name,
-                parent=parent,
-                doxygen=doxygen,
-                comments=comments
-            ))
-        
-        # Process typedef struct/enum/union
-        for pattern_name in ["typedef_struct", "typedef_enum", "typedef_union", 
-                            "typedef_anon_struct", "typedef_anon_enum", "typedef_anon_union"]:
-            for match in self.PATTERNS[pattern_name].finditer(source):
+        def typedefs():
+            for match in scan("typedef", "typedef"):
                 start_idx = match.start()
                 name = match.group(1)
                 end_idx = match.end()
-                start_line = self._find_line_number(source, start_idx)
-                end_line = self._find_line_number(source, end_idx)
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
                 
                 code = source[start_idx:end_idx]
                 
-                # Find associated comments
-                doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
-                if doxygen:
-                    doxygen = _parse_doxygen_comment(doxygen)
+                # Find conditional context
+                parent = conditional_context(start_line)
                 
-                comments = []
-                if self.include_comments:
-                    comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
-                    if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                        comments.append(comment)
+                yield ASTNode(
+                    type="type_definition",
+                    code=code,
+                    start_line=start_line,
+                    end_line=end_line,
+                    name=name,
+                    parent=parent
+                )
+        
+        # Process typedef struct/enum/union
+        def typedef_compounds(pattern_name):
+            for match in scan(pattern_name, "typedef"):
+                start_idx = match.start()
+                name = match.group(1)
+                end_idx = match.end()
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
+                
+                code = source[start_idx:end_idx]
                 
                 # Find conditional context
-                parent = conditional_contexts.get(start_line)
+                parent = conditional_context(start_line)
                 
-                nodes.append(ASTNode(
+                yield ASTNode(
                     type="type_definition",
                     code=code,
                     start_line=start_line,
                     end_line=end_line,
                     name=name,
-                    parent=parent,
-                    doxygen=doxygen,
-                    comments=comments
-                ))
+                    parent=parent
+                )
         
         # Process macro definitions
-        for match in self.PATTERNS["macro_definition"].finditer(source):
-            start_idx = match.start()
-            name = match.group(1)
-            end_idx = match.end()
-            start_line = self._find_line_number(source, start_idx)
-            end_line = self._find_line_number(source, end_idx)
-            
-            code = source[start_idx:end_idx]
-            
-            # Check if this is a function-like macro
-            is_function = '(' in code and ')' in code and code.index('(') < code.index(')')
-            
-            # Find associated comments
-            doxygen = _find_nearest_comment(source, start_line, DOXYGEN_COMMENT, self.max_comment_gap)
+        def macro_definitions():
+            for match in scan("macro_definition", "#define"):
+                start_idx = match.start()
+                name = match.group(1)
+                end_idx = match.end()
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
+                
+                code = source[start_idx:end_idx]
+                
+                # Check if this is a function-like macro
+                is_function = '(' in code and ')' in code and code.index('(') < code.index(')')
+                
+                # Find conditional context
+                parent = conditional_context(start_line)
+                
+                yield ASTNode(
+                    type="preproc_function_def" if is_function else "preproc_def",
+                    code=code,
+                    start_line=start_line,
+                    end_line=end_line,
+                    name=name,
+                    parent=parent
+                )
+        
+        # Each pass yields nodes in source order; merging them on start_line gives the
+        # order a stable sort of all passes would, without holding every node at once
+        merged = heapq.merge(
+            function_definitions(), function_declarations(), struct_specifiers(),
+            enum_specifiers(), enum_definitions(), typedefs(),
+            *(typedef_compounds(pattern_name) for pattern_name in (
+                "typedef_struct", "typedef_enum", "typedef_union",
+                "typedef_anon_struct", "typedef_anon_enum", "typedef_anon_union")),
+            macro_definitions(),
+            key=lambda n: n.start_line)
+        
+        # Comments are attached in the same line-ordered sweep, walking the comment
+        # lists alongside the nodes instead of searching them once per node
+        doxygen_cursor = _CommentCursor(doxygen_blocks, self.max_comment_gap)
+        comment_cursor = _CommentCursor(comment_blocks, self.max_comment_gap)
+        for node in merged:
+            doxygen = doxygen_cursor.nearest(node.start_line)
             if doxygen:
-                doxygen = _parse_doxygen_comment(doxygen)
+                doxygen = node.doxygen = _parse_doxygen_comment(doxygen)
             
-            comments = []
             if self.include_comments:
-                comment = _find_nearest_comment(source, start_line, C_COMMENT, self.max_comment_gap)
+                comment = comment_cursor.nearest(node.start_line)
                 if comment and (not doxygen or comment["raw"] != doxygen.get("raw")):
-                    comments.append(comment)
-            
-            # Find conditional context
-            parent = conditional_contexts.get(start_line)
+                    node.comments.append(comment)
             
-            nodes.append(ASTNode(
-                type="preproc_function_def" if is_function else "preproc_def",
-                code=code,
-                start_line=start_line,
-                end_line=end_line,
-                name=name,
-                parent=parent,
-                doxygen=doxygen,
-                comments=comments
-            ))
-        
-        # Sort nodes by line number
-        nodes.sort(key=lambda n: n.start_line)
-        return nodes
+            yield node
 
 class CChunker:
     """
@@ -556,7 +624,8 @@ class CChunker:
         Returns:
             List of chunks, each containing content and metadata
         """
-        nodes = self.parser.parse_source(code, filepath)
+        # Nodes are consumed as the parser yields them, so only the buffer is held
+        nodes = self.parser.iter_nodes(code, filepath)
         
         if self.one_symbol_per_chunk:
             # One chunk per symbol
@@ -566,66 +635,70 @@ class CChunker:
                 chunks.append(self._emit_chunk([node], content, filepath))
             return chunks
         
-        # Buffered mode - group nodes into chunks
-        chunks, buffer, node_buffer = [], "", []
+        # Buffered mode - group nodes into chunks. The buffer is kept as a list of
+        # node contents; buffer_len tracks len("\n\n".join(buffer)) so the text is
+        # only built once per emitted chunk
+        chunks, buffer, node_buffer, buffer_len = [], [], [], 0
         
         for node in nodes:
             node_content = self._format_node_content(node)
             
             # If adding this node would exceed max size, emit the current buffer
-            if buffer and (len(buffer) + len(node_content) > self.max_chunk_size):
-                chunks.append(self._emit_chunk(node_buffer, buffer, filepath))
+            if buffer_len and (buffer_len + len(node_content) > self.max_chunk_size):
+                chunks.append(self._emit_chunk(node_buffer, "\n\n".join(buffer), filepath))
                 
                 # Handle overlap if needed
                 if self.overlap_units and node_buffer:
-                    keep = node_buffer[-self.overlap_units:]
-                    buffer = "\n\n".join(self._format_node_content(n) for n in keep)
-                    node_buffer = keep
+                    node_buffer = node_buffer[-self.overlap_units:]
+                    buffer = buffer[-self.overlap_units:]
+                    buffer_len = len("\n\n".join(buffer))
                 else:
-                    buffer, node_buffer = "", []
+                    buffer, node_buffer, buffer_len = [], [], 0
             
             # Add the node to the buffer
             node_buffer.append(node)
-            buffer = (buffer + "\n\n" + node_content) if buffer else node_content
+            buffer.append(node_content)
+            buffer_len += (len(node_content) + 2) if buffer_len else len(node_content)
         
         # Emit any remaining buffer
         if node_buffer:
-            chunks.append(self._emit_chunk(node_buffer, buffer, filepath))
+            chunks.append(self._emit_chunk(node_buffer, "\n\n".join(buffer), filepath))
             
         return chunks
     
     def _format_node_content(self, node: ASTNode) -> str:
         """Format a node's content including documentation."""
+        # Undocumented nodes are just their code
+        if not node.doxygen and not node.comments:
+            return node.code
+        
         content = []
         
         # Add Doxygen comment if available
-        if node.doxygen:
-            if node.doxygen.get("brief"):
-                content.append(f"Brief: {node.doxygen['brief']}")
+        doxygen = node.doxygen
+        if doxygen:
+            if doxygen.get("brief"):
+                content.append("Brief: " + doxygen["brief"])
             
-            if node.doxygen.get("text"):
-                content.append(node.doxygen["text"])
+            if doxygen.get("text"):
+                content.append(doxygen["text"])
             
             # Add parameters documentation
-            if node.doxygen.get("param"):
+            if doxygen.get("param"):
                 content.append("Parameters:")
-                for param in node.doxygen["param"]:
-                    content.append(f"- {param}")
+                content.extend(f"- {param}" for param in doxygen["param"])
             
             # Add return value documentation
-            if node.doxygen.get("return") or node.doxygen.get("retval"):
+            if doxygen.get("return") or doxygen.get("retval"):
                 content.append("Returns:")
-                for ret in node.doxygen.get("return", []) + node.doxygen.get("retval", []):
-                    content.append(f"- {ret}")
+                content.extend(f"- {ret}" for ret in doxygen.get("return", []) + doxygen.get("retval", []))
             
             if content:
                 content.append("")  # Add a blank line after documentation
         
         # Add regular comments if available
         if node.comments:
-            for comment in node.comments:
-                if comment.get("text"):
-                    content.append(f"Comment: {comment['text']}")
+            content.extend("Comment: " + comment["text"] for comment in node.comments if comment.get("text"))
             if content:
                 content.append("")  # Add a blank line after comments
         
@@ -658,16 +731,93 @@ class CChunker:
             "metadata": metadata
         }
 
+HEADER_SUFFIXES = (".h", ".hpp")
+
+def _walk_headers(root) -> Iterator[pathlib.Path]:
+    """
+    Yield the paths of all header files below a directory.
+    
+    Uses os.scandir so file types come from the cached directory entries
+    instead of a stat() call per entry; only matches are wrapped in a Path.
+    """
+    stack = [root]
+    while stack:
+        subdirs = []
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(HEADER_SUFFIXES) and entry.is_file():
+                        yield pathlib.Path(entry.path)
+        except OSError:
+            continue
+        # Visit subdirectories in the order they were listed
+        stack.extend(reversed(subdirs))
+
 def _iter_header_files(paths):
     """Iterate over all header files in the given paths."""
     for p in paths:
         p = pathlib.Path(p)
-        if p.is_file() and p.suffix.lower() in (".h", ".hpp"):
+        if p.is_file() and p.suffix.lower() in HEADER_SUFFIXES:
             yield p
         elif p.is_dir():
-            for f in p.rglob("*"):
-                if f.is_file() and f.suffix.lower() in (".h", ".hpp"):
-                    yield f
+            yield from _walk_headers(p)
+
+def _read_source(path) -> bytes:
+    """Read a source file as bytes, applying the newline translation read_text() would."""
+    b = pathlib.Path(path).read_bytes()
+    if b"\r" in b:
+        b = b.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return b
+
+def _read_text(path) -> str:
+    """
+    Read a source file as text, the same as read_text(encoding="utf-8", errors="ignore").
+    
+    The file is read in one call and decoded in one pass, instead of going
+    through a text wrapper that decodes and translates newlines chunk by chunk.
+    """
+    return _read_source(path).decode("utf-8", "ignore")
+
+def _write_lines(q: queue.Queue, out, errors: List[Exception]) -> None:
+    """
+    Write queued blocks of JSONL to out until the None sentinel arrives.
+    
+    Runs on the CLIs' writer thread. The queue is always drained to the sentinel,
+    so the producer can't block on it; a write error is appended to errors for
+    the producer to re-raise once the thread is joined.
+    """
+    try:
+        while (data := q.get()) is not None:
+            out.write(data)
+        out.flush()
+        return
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`)
+        pass
+    except Exception as e:
+        errors.append(e)
+    while q.get() is not None:
+        pass
+
+# Buffer size of the output file main() writes to
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Each worker process builds its chunker once, from the options main() passes
+_chunker = None
+
+def _init_worker(chunker_options: Dict[str, Any]):
+    global _chunker
+    _chunker = CChunker(**chunker_options)
+
+def _process_one(path: pathlib.Path) -> List[Dict]:
+    """Chunk one header in a worker process; errors are reported and yield no chunks."""
+    try:
+        return _chunker.chunkify(_read_text(path), filepath=str(path))
+    except Exception as e:
+        print(f"Error processing {path}: {e}", file=sys.stderr)
+        return []
 
 def main():
     """Command-line interface for the chunker."""
@@ -680,30 +830,34 @@ def main():
     ap.add_argument("--output", "-o", help="Output file (default: stdout)")
     args = ap.parse_args()
     
-    chunker = CChunker(
-        max_chunk_size=args.max_chars,
-        chunk_overlap_units=args.overlap,
-        one_symbol_per_chunk=args.one_per_symbol,
-        include_comments=not args.no_comments
-    )
+    chunker_options = {
+        "max_chunk_size": args.max_chars,
+        "chunk_overlap_units": args.overlap,
+        "one_symbol_per_chunk": args.one_per_symbol,
+        "include_comments": not args.no_comments,
+    }
     
-    chunks = []
-    for path in _iter_header_files(args.inputs):
+    # Files are independent, so they are chunked in worker processes;
+    # map() keeps results in input order, so output matches a sequential run
+    paths = list(_iter_header_files(args.inputs))
+    with contextlib.ExitStack() as stack:
+        out = stack.enter_context(open(args.output, "wb", buffering=OUTPUT_BUFFER_SIZE)) if args.output else sys.stdout.buffer
+        # A writer thread drains each file's serialized lines, so a slow output
+        # doesn't hold up collecting results from the pool
+        q, errors = queue.Queue(maxsize=1024), []
+        writer = threading.Thread(target=_write_lines, args=(q, out, errors))
+        writer.start()
         try:
-            source = pathlib.Path(path).read_text(encoding="utf-8", errors="ignore")
-            file_chunks = chunker.chunkify(source, filepath=str(path))
-            chunks.extend(file_chunks)
-        except Exception as e:
-            print(f"Error processing {path}: {e}", file=sys.stderr)
-    
-    # Output the chunks
-    if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            for chunk in chunks:
-                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
-    else:
-        for chunk in chunks:
-            print(json.dumps(chunk, ensure_ascii=False))
+            with ProcessPoolExecutor(initializer=_init_worker, initargs=(chunker_options,)) as ex:
+                for file_chunks in ex.map(_process_one, paths, chunksize=8):
+                    if errors:
+                        break
+                    q.put(b"".join(_dumps(chunk) + b"\n" for chunk in file_chunks))
+        finally:
+            q.put(None)
+            writer.join()
+        if errors:
+            raise errors[0]
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,4 +1,7 @@
-import re, json, hashlib, sys, pathlib, argparse
+import re, sys, argparse, bisect, functools, queue, threading
+from concurrent.futures import ProcessPoolExecutor
+
+from parsing.parsers.c_ast_parser_simple import _sha, _iter_header_files, _read_source, _dumps, _write_lines
 
 # Prefer language pack (bundles grammars); fallback to tree-sitter-languages if installed
 try:
@@ -6,35 +9,52 @@ try:
 except ImportError:
     from tree_sitter_languages import get_parser       # pip: tree-sitter-languages
 
-DOXY = re.compile(r"/\*\*!(?:.|\n)*?\*/|/\*\*(?:.|\n)*?\*/", re.MULTILINE)
+DOXY = re.compile(rb"/\*\*!?[\s\S]*?\*/")
+_DOX_STRIP = re.compile(r"^/\*\*!?|\*/$")
+_DOX_STAR = re.compile(r"^\s*\* ?")
+_DOX_TAG = re.compile(r"@(\w+)\s*(.*)")
+# whitespace, comments and single-line directives: what an include-only header is made of
+_TRIVIA = re.compile(rb"\s+|//[^\n]*|/\*[\s\S]*?\*/|#[ \t]*(\w*)[^\n]*")
 
-def _sha(*xs): return hashlib.sha1("|".join(map(str, xs)).encode()).hexdigest()[:16]
+# grammar loading is the slow part of get_parser(); share one parser per process
+@functools.lru_cache(maxsize=1)
+def _c_parser(): return get_parser("c")
 
-def _line_offsets(s: str):
+# offsets are in bytes, the same space tree-sitter reports node positions in
+def _line_offsets(b: bytes):
     offs, acc = [0], 0
-    for ln in s.splitlines(True):
+    for ln in b.splitlines(True):
         acc += len(ln); offs.append(acc)
     return offs
 
 def _byte_to_line(b: int, offs):
-    import bisect
     return bisect.bisect_right(offs, b) - 1
 
-def _nearest_doxygen_above(src: str, start_line: int):
-    blocks = [(m.start(), m.end(), m.group(0)) for m in DOXY.finditer(src)]
-    offs = _line_offsets(src)
-    best, gap = None, 10**9
-    for b0, b1, raw in blocks:
-        end_ln = _byte_to_line(b1, offs)
-        if 0 <= (start_line - end_ln) < gap:
-            best, gap = raw, start_line - end_ln
-    if not best: return None
-    body = re.sub(r"^/\*\*!?|\*/$", "", best.strip())
-    body = "\n".join(re.sub(r"^\s*\* ?", "", ln) for ln in body.splitlines())
+def _is_trivial(b: bytes):
+    # True when the source has no code and no #define, so no unit can come out of it;
+    # stops at the first token that isn't trivia, which is early in any real header
+    pos, n = 0, len(b)
+    while pos < n:
+        m = _TRIVIA.match(b, pos)
+        if not m or m.group(1) == b"define": return False
+        pos = m.end()
+    return True
+
+def _doxygen_blocks(src: bytes, offs):
+    return [(_byte_to_line(m.end(), offs), m.group(0)) for m in DOXY.finditer(src)]
+
+def _nearest_doxygen_above(blocks, start_line: int):
+    i = bisect.bisect_right(blocks, start_line, key=lambda b: b[0]) - 1
+    if i < 0: return None
+    # several blocks can end on the same line; the first one wins
+    i = bisect.bisect_left(blocks, blocks[i][0], key=lambda b: b[0])
+    best = blocks[i][1].decode("utf-8", "ignore")
+    body = _DOX_STRIP.sub("", best.strip())
+    body = "\n".join(_DOX_STAR.sub("", ln) for ln in body.splitlines())
 
     tags, free = {}, []
     for ln in body.splitlines():
-        m = re.match(r"@(\w+)\s*(.*)", ln)
+        m = _DOX_TAG.match(ln)
         if m: tags.setdefault(m.group(1).lower(), []).append(m.group(2))
         else: free.append(ln)
 
@@ -48,10 +68,22 @@ def _nearest_doxygen_above(src: str, start_line: int):
         "text": "\n".join(free).strip() or None
     }
 
+# units and buffered items are created per AST node, so keep them small
+class _Unit:
+    __slots__ = ("type", "start_byte", "end_byte", "start", "end")
+    def __init__(self, type, start_byte, end_byte, start, end):
+        self.type, self.start_byte, self.end_byte, self.start, self.end = type, start_byte, end_byte, start, end
+
+class _BufItem:
+    __slots__ = ("u", "dox", "content")
+    def __init__(self, u, dox, content):
+        self.u, self.dox, self.content = u, dox, content
+
 class CChunker:
     """
     AST-aware chunker for C headers with Doxygen pairing.
-    - Recursively walks the full tree (handles #ifdef/#ifndef wrapping).
+    - Finds units anywhere in the tree via a tree-sitter query (handles #ifdef/#ifndef
+      wrapping), skipping units nested in function bodies.
     - Emits either one-symbol-per-chunk or buffered chunks by max chars.
     """
     TARGET = {
@@ -63,83 +95,108 @@ class CChunker:
         "preproc_def",
         "preproc_function_def",
     }
+    # targets whose subtrees hold nothing worth chunking separately
+    OPAQUE = {"function_definition"}
 
     def __init__(self, max_chunk_size=1600, chunk_overlap_units=1, one_symbol_per_chunk=False):
-        self.parser = get_parser("c")
+        self.parser = _c_parser()
+        self._query = self.parser.language.query(" ".join(f"({t}) @u" for t in sorted(self.TARGET)))
         self.max = max_chunk_size
         self.overlap_units = chunk_overlap_units
         self.one_symbol = one_symbol_per_chunk
 
-    def _units(self, src: str):
-        b = src.encode("utf-8")
+    def _units(self, b: bytes, offs):
         tree = self.parser.parse(b)
-        root = tree.root_node
-        offs = _line_offsets(src)
-
-        def visit(n):
-            if n.type in self.TARGET:
-                code = b[n.start_byte:n.end_byte].decode("utf-8", "ignore")
-                start = _byte_to_line(n.start_byte, offs)
-                end   = _byte_to_line(n.end_byte, offs)
-                yield {"type": n.type, "code": code, "start": start, "end": end}
-            for ch in n.children:
-                yield from visit(ch)
 
-        yield from visit(root)
-
-    def chunkify(self, code: str, filepath: str | None = None):
+        # the query engine filters node types in C (tree-sitter 0.22 returns
+        # (node, name) pairs, 0.23 a dict); put captures back in pre-order
+        caps = self._query.captures(tree.root_node)
+        nodes = caps.get("u", []) if isinstance(caps, dict) else [n for n, _ in caps]
+        nodes.sort(key=lambda n: (n.start_byte, -n.end_byte))
+        skip_until = -1
+        for n in nodes:
+            if n.start_byte < skip_until:
+                continue
+            if n.type in self.OPAQUE:
+                skip_until = n.end_byte
+            start = _byte_to_line(n.start_byte, offs)
+            end   = _byte_to_line(n.end_byte, offs)
+            yield _Unit(n.type, n.start_byte, n.end_byte, start, end)
+
+    @staticmethod
+    def _content(u, dx, b: bytes):
+        # the unit's source is only decoded when there is no Doxygen text to use instead
+        text = dx.get("text") if dx else None
+        if text is None:
+            text = b[u.start_byte:u.end_byte].decode("utf-8", "ignore")
+        return ((dx.get("brief")+"\n\n") if dx and dx.get("brief") else "") + text
+
+    def chunkify(self, code: str | bytes, filepath: str | None = None):
+        # parse, line lookup and the Doxygen scan all work on one UTF-8 buffer;
+        # raw file bytes are used as-is
+        b = code if isinstance(code, bytes) else code.encode("utf-8")
+        if _is_trivial(b):
+            return []
+        offs = _line_offsets(b)
+        blocks = _doxygen_blocks(b, offs)
         if self.one_symbol:
             chunks = []
-            for u in self._units(code):
-                dx = _nearest_doxygen_above(code, u["start"])
-                content = ((dx.get("brief")+"\n\n") if dx and dx.get("brief") else "") + (dx.get("text") or u["code"])
-                chunks.append(self._emit(content, [{"u":u, "dox":dx, "content":content}], filepath))
+            for u in self._units(b, offs):
+                dx = _nearest_doxygen_above(blocks, u.start)
+                content = self._content(u, dx, b)
+                chunks.append(self._emit(content, [_BufItem(u, dx, content)], filepath))
             return chunks
 
-        # buffered mode
-        chunks, buf, units_buf = [], "", []
-        for u in self._units(code):
-            dx = _nearest_doxygen_above(code, u["start"])
-            content = ((dx.get("brief")+"\n\n") if dx and dx.get("brief") else "") + (dx.get("text") or u["code"])
+        # buffered mode; buf_len tracks len("\n\n".join(contents)) so the
+        # buffer text is only built once per emitted chunk
+        chunks, units_buf, buf_len = [], [], 0
+        for u in self._units(b, offs):
+            dx = _nearest_doxygen_above(blocks, u.start)
+            content = self._content(u, dx, b)
 
-            if buf and (len(buf) + len(content) > self.max):
-                chunks.append(self._emit(buf, units_buf, filepath))
+            if buf_len and (buf_len + len(content) > self.max):
+                chunks.append(self._emit(self._join(units_buf), units_buf, filepath))
                 if self.overlap_units and units_buf:
-                    keep = units_buf[-self.overlap_units:]
-                    buf = "\n\n".join(x["content"] for x in keep); units_buf = keep
+                    units_buf = units_buf[-self.overlap_units:]
+                    buf_len = len(self._join(units_buf))
                 else:
-                    buf, units_buf = "", []
+                    units_buf, buf_len = [], 0
 
-            units_buf.append({"u":u, "dox":dx, "content":content})
-            buf = (buf+"\n\n"+content) if buf else content
+            units_buf.append(_BufItem(u, dx, content))
+            buf_len += (len(content) + 2) if buf_len else len(content)
 
         if units_buf:
-            chunks.append(self._emit(buf, units_buf, filepath))
+            chunks.append(self._emit(self._join(units_buf), units_buf, filepath))
         return chunks
 
+    @staticmethod
+    def _join(units):
+        return "\n\n".join(x.content for x in units)
+
     def _emit(self, text, units, filepath):
-        first = units[0]["u"]
+        first = units[0].u
         md = {
             "language": "c",
             "filepath": filepath or "",
-            "chunk_units": [{"type": x["u"]["type"], "start": x["u"]["start"], "end": x["u"]["end"]} for x in units],
-            "doxygen": [x["dox"] for x in units if x["dox"]],
+            "chunk_units": [{"type": x.u.type, "start": x.u.start, "end": x.u.end} for x in units],
+            "doxygen": [x.dox for x in units if x.dox],
         }
         return {
-            "id": _sha(filepath, first["start"], first["end"]),
+            "id": _sha(filepath, first.start, first.end),
             "content": text,
             "metadata": md
         }
 
-def _iter_header_files(paths):
-    for p in paths:
-        p = pathlib.Path(p)
-        if p.is_file() and p.suffix.lower() in (".h", ".hpp"):
-            yield p
-        elif p.is_dir():
-            for f in p.rglob("*"):
-                if f.is_file() and f.suffix.lower() in (".h", ".hpp"):
-                    yield f
+# tree-sitter parsers don't pickle, so each worker process builds its own chunker
+_chunker = None
+
+def _init_worker(max_chunk_size, chunk_overlap_units, one_symbol_per_chunk):
+    global _chunker
+    _chunker = CChunker(max_chunk_size=max_chunk_size, chunk_overlap_units=chunk_overlap_units, one_symbol_per_chunk=one_symbol_per_chunk)
+
+def _process_one(path):
+    # raw bytes go straight to chunkify
+    return _chunker.chunkify(_read_source(path), filepath=str(path))
 
 def main():
     ap = argparse.ArgumentParser(description="AST-aware chunker for C headers")
@@ -149,11 +206,20 @@ def main():
     ap.add_argument("--one-per-symbol", action="store_true", help="Emit one chunk per AST unit")
     args = ap.parse_args()
 
-    ch = CChunker(max_chunk_size=args.max_chars, chunk_overlap_units=args.overlap, one_symbol_per_chunk=args.one_per_symbol)
-    for path in _iter_header_files(args.inputs):
-        s = pathlib.Path(path).read_text(encoding="utf-8", errors="ignore")
-        for c in ch.chunkify(s, filepath=str(path)):
-            print(json.dumps(c, ensure_ascii=False))
+    paths = list(_iter_header_files(args.inputs))
+    # a writer thread drains serialized lines so a slow stdout consumer doesn't stall the pool
+    q, errors = queue.Queue(maxsize=1024), []
+    writer = threading.Thread(target=_write_lines, args=(q, sys.stdout.buffer, errors))
+    writer.start()
+    try:
+        with ProcessPoolExecutor(initializer=_init_worker, initargs=(args.max_chars, args.overlap, args.one_per_symbol)) as ex:
+            # map() keeps results in input order, so output matches a sequential run
+            for file_chunks in ex.map(_process_one, paths, chunksize=8):
+                if errors: break
+                q.put(b"".join(_dumps(c) + b"\n" for c in file_chunks))
+    finally:
+        q.put(None); writer.join()
+    if errors: raise errors[0]
 
 if __name__ == "__main__":
     main()
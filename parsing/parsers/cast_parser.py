@@ -24,14 +24,10 @@ from collections import defaultdict
 
 # Import existing code
 from parsing.parsers.c_ast_parser_simple import (
-    _sha, _line_offsets, _byte_to_line, _find_nearest_comment,
-    _parse_doxygen_comment, ASTNode, RegexBasedCParser
+    _sha, _line_offsets, _byte_to_line,
+    _parse_doxygen_comment, _NODE_DATACLASS, ASTNode, RegexBasedCParser
 )
 
-# Regular expressions for C code structures
-DOXYGEN_COMMENT = re.compile(r"/\*\*!(?:.|\n)*?\*/|/\*\*(?:.|\n)*?\*/", re.MULTILINE)
-C_COMMENT = re.compile(r"/\*(?:.|\n)*?\*/|//.*?$", re.MULTILINE)
-
 # Node types ordered by hierarchy level (used for merging related nodes)
 NODE_HIERARCHY = {
     # Preprocessor directives are top-level containers
@@ -55,7 +51,17 @@ NODE_HIERARCHY = {
     "preproc_def": 5,
 }
 
-@dataclass
+# Enhanced patterns for better structure detection, compiled once at import;
+# every CASTParser adds them to the shared pattern table
+CAST_PATTERNS = {
+    "include_directive": re.compile(r'#include\s+[<"]([^>"]+)[>"]', re.MULTILINE),
+    "typedef_struct": re.compile(r'typedef\s+struct\s+(\w+)(?:\s*\{[^}]*\}|\s*;)', re.MULTILINE | re.DOTALL),
+    "typedef_enum": re.compile(r'typedef\s+enum\s+(\w+)(?:\s*\{[^}]*\}|\s*;)', re.MULTILINE | re.DOTALL),
+    "typedef_union": re.compile(r'typedef\s+union\s+(\w+)(?:\s*\{[^}]*\}|\s*;)', re.MULTILINE | re.DOTALL),
+    "struct_field": re.compile(r'(\w+(?:\s*\*+)?)\s+(\w+)(?:\[[^\]]*\])?\s*;', re.MULTILINE),
+}
+
+@dataclass(**_NODE_DATACLASS)
 class CASTNode(ASTNode):
     """
     Enhanced AST node with additional properties for CAST approach.
@@ -63,6 +69,8 @@ class CASTNode(ASTNode):
     children: List["CASTNode"] = field(default_factory=list)
     parent_node: Optional["CASTNode"] = None
     depth: int = 0
+    # get_full_context() result, kept once computed; reset when the parent changes
+    _context_cache: Optional[str] = field(default=None, init=False, repr=False)
     
     def __hash__(self):
         """Make the node hashable based on its position and type."""
@@ -82,9 +90,12 @@ class CASTNode(ASTNode):
         self.children.append(child)
         child.parent_node = self
         child.depth = self.depth + 1
+        child._context_cache = None
     
     def get_full_context(self) -> str:
         """Get the full context including parent nodes."""
+        if self._context_cache is not None:
+            return self._context_cache
         context = []
         if self.parent_node:
             context.append(self.parent_node.get_full_context())
@@ -92,11 +103,13 @@ class CASTNode(ASTNode):
             context.append(f"{self.type}:{self.name}")
         else:
             context.append(self.type)
-        return "/".join(filter(None, context))
+        self._context_cache = "/".join(filter(None, context))
+        return self._context_cache
     
     def to_dict(self) -> Dict:
         """Convert to dictionary representation with enhanced metadata."""
-        result = super().to_dict()
+        # a slotted dataclass is a rebuilt class, which breaks zero-argument super()
+        result = ASTNode.to_dict(self)
         result["depth"] = self.depth
         result["context"] = self.get_full_context()
         return result
@@ -110,13 +123,7 @@ class CASTParser(RegexBasedCParser):
         super().__init__(include_comments, max_comment_gap)
         
         # Enhanced patterns for better structure detection
-        self.PATTERNS.update({
-            "include_directive": re.compile(r'#include\s+[<"]([^>"]+)[>"]', re.MULTILINE),
-            "typedef_struct": re.compile(r'typedef\s+struct\s+(\w+)(?:\s*\{[^}]*\}|\s*;)', re.MULTILINE | re.DOTALL),
-            "typedef_enum": re.compile(r'typedef\s+enum\s+(\w+)(?:\s*\{[^}]*\}|\s*;)', re.MULTILINE | re.DOTALL),
-            "typedef_union": re.compile(r'typedef\s+union\s+(\w+)(?:\s*\{[^}]*\}|\s*;)', re.MULTILINE | re.DOTALL),
-            "struct_field": re.compile(r'(\w+(?:\s*\*+)?)\s+(\w+)(?:\[[^\]]*\])?\s*;', re.MULTILINE),
-        })
+        self.PATTERNS.update(CAST_PATTERNS)
     
     def _build_hierarchy(self, nodes: List[CASTNode]) -> List[CASTNode]:
         """
@@ -126,8 +133,10 @@ class CASTParser(RegexBasedCParser):
         relationships between nodes based on their structural relationships.
         """
         # First, identify preprocessor directive blocks (ifdef/ifndef/if -> endif)
+        # Blocks are keyed by id(node): nodes of one parse are distinct objects, and
+        # identity lookups skip building and hashing a value tuple per access
         preproc_stack = []
-        preproc_blocks = {}
+        preproc_blocks: Dict[int, Tuple[int, int]] = {}
         
         # First pass: identify preprocessor blocks
         for node in sorted(nodes, key=lambda n: n.start_line):
@@ -135,64 +144,47 @@ class CASTParser(RegexBasedCParser):
                 preproc_stack.append(node)
             elif node.type == "preproc_endif" and preproc_stack:
                 start_node = preproc_stack.pop()
-                preproc_blocks[start_node] = (start_node.start_line, node.end_line)
+                preproc_blocks[id(start_node)] = (start_node.start_line, node.end_line)
         
-        # Second pass: identify struct/enum hierarchy
-        # For example, a typedef struct might contain nested structs
-        struct_hierarchy = {}
-        for node in nodes:
-            if node.type in {"type_definition", "struct_specifier", "enum_specifier", "union_specifier"}:
-                for potential_child in nodes:
-                    if potential_child != node and \
-                       potential_child.start_line > node.start_line and \
-                       potential_child.end_line < node.end_line and \
-                       potential_child.type in {"struct_specifier", "enum_specifier", "union_specifier"}:
-                        struct_hierarchy[potential_child] = node
+        # A preprocessor block contains what lies between its directive and #endif
+        def block_end(node):
+            block = preproc_blocks.get(id(node))
+            return block[1] if block is not None else node.end_line
         
         # Sort nodes by start line and then by hierarchy level (containers first)
         # We need to process preprocessor directives first as they can contain other elements
         nodes.sort(key=lambda n: (n.start_line, NODE_HIERARCHY.get(n.type, 99)))
         
-        # Find potential parent-child relationships
+        # Line ranges as parallel lists, so the sweep below compares plain ints
+        # instead of reading node attributes for every candidate pair
+        starts = [n.start_line for n in nodes]
+        ends = [n.end_line for n in nodes]
+        block_ends = [block_end(n) for n in nodes]
+        
+        # Find potential parent-child relationships. Only earlier nodes can contain a
+        # node, and a node that ends above the current start line cannot contain it
+        # or anything after it, so candidates are kept as a list of still-open node
+        # indices (in sort order) that is pruned as the sweep moves down the file.
         root_nodes = []
-        node_map = {(n.start_line, n.end_line): n for n in nodes}
+        open_nodes = []
         
-        for node in nodes:
-            # Find potential parent nodes (nodes that fully contain this node)
-            parent_found = False
+        for i, node in enumerate(nodes):
+            start, end = starts[i], ends[i]
+            open_nodes = [p for p in open_nodes if block_ends[p] >= start]
+            closest = -1
             
-            for parent in nodes:
-                if parent == node:
-                    continue
-                    
+            for p in open_nodes:
                 # Check if parent contains this node
-                parent_contains_node = False
-                
-                # Special handling for preprocessor directives
-                if parent.type in {"preproc_ifdef", "preproc_ifndef", "preproc_if"} and parent in preproc_blocks:
-                    start_line, end_line = preproc_blocks[parent]
-                    if start_line < node.start_line and end_line >= node.end_line:
-                        parent_contains_node = True
-                # Special handling for struct hierarchy
-                elif node in struct_hierarchy and struct_hierarchy[node] == parent:
-                    parent_contains_node = True
-                # Normal containment check
-                elif parent.start_line < node.start_line and parent.end_line >= node.end_line:
-                    parent_contains_node = True
-                    
-                if parent_contains_node:
+                if starts[p] < start and block_ends[p] >= end:
                     
                     # Find the closest parent
-                    if not parent_found or (
-                        node.parent_node and
-                        parent.start_line > node.parent_node.start_line and
-                        parent.end_line <= node.parent_node.end_line
-                    ):
-                        parent.add_child(node)
-                        parent_found = True
+                    if closest < 0 or (starts[p] > starts[closest] and ends[p] <= ends[closest]):
+                        nodes[p].add_child(node)
+                        closest = p
             
-            if not parent_found:
+            if closest < 0:
                 root_nodes.append(node)
+            open_nodes.append(i)
         
         return root_nodes
     
@@ -221,24 +213,17 @@ class CASTParser(RegexBasedCParser):
         # Build hierarchy
         root_nodes = self._build_hierarchy(cast_nodes)
         
-        # Update depths based on hierarchy
-        def _update_depths(node, depth=0):
-            node.depth = depth
-            for child in node.children:
-                _update_depths(child, depth + 1)
-        
-        for root in root_nodes:
-            _update_depths(root)
-        
-        # Flatten back to a list for compatibility with existing code
+        # Update depths based on hierarchy and flatten back to a list for
+        # compatibility with existing code, in one pre-order walk with an
+        # explicit stack (no recursion limit on deeply nested headers)
         flattened = []
+        stack = [(root, 0) for root in reversed(root_nodes)]
+        while stack:
+            node, depth = stack.pop()
+            node.depth = depth
+            flattened.append(node)
+            stack.extend((child, depth + 1) for child in reversed(node.children))
         
-        def _flatten(nodes):
-            for node in nodes:
-                flattened.append(node)
-                _flatten(node.children)
-        
-        _flatten(root_nodes)
         return flattened
 
 class CASTChunker:
@@ -278,6 +263,9 @@ class CASTChunker:
         self.overlap_units = chunk_overlap_units
         self.one_symbol_per_chunk = one_symbol_per_chunk
         self.respect_hierarchy = respect_hierarchy
+        # Formatted node contents, keyed by id(node), while chunkify runs; a node's
+        # text is needed for the split check, for grouping and again for the chunk
+        self._formatted: Optional[Dict[int, Tuple[CASTNode, str]]] = None
     
     def _get_node_size(self, node: CASTNode) -> int:
         """Get the size of a node including its documentation."""
@@ -403,6 +391,13 @@ class CASTChunker:
     
     def _format_node_content(self, node: CASTNode) -> str:
         """Format a node's content including documentation."""
+        formatted = self._formatted
+        if formatted is not None:
+            # The node is stored with its text, so its id can't be reused meanwhile
+            entry = formatted.get(id(node))
+            if entry is not None:
+                return entry[1]
+        
         content = []
         
         # Add Doxygen comment if available
@@ -445,7 +440,10 @@ class CASTChunker:
         # Add the code
         content.append(node.code)
         
-        return "\n".join(content)
+        text = "\n".join(content)
+        if formatted is not None:
+            formatted[id(node)] = (node, text)
+        return text
     
     def _emit_chunk(self, nodes: List[CASTNode], content: str, filepath: Optional[str] = None) -> Dict:
         """Create a chunk from the given nodes and content."""
@@ -488,6 +486,15 @@ class CASTChunker:
         Returns:
             List of chunks, each containing content and metadata
         """
+        # Each node is formatted once per call, however often its text is needed
+        self._formatted = {}
+        try:
+            return self._chunkify(code, filepath)
+        finally:
+            self._formatted = None
+    
+    def _chunkify(self, code: str, filepath: Optional[str]) -> List[Dict]:
+        """Chunk the given code; chunkify() sets up the formatted-content cache."""
         # Parse the source into nodes
         nodes = self.parser.parse_source(code, filepath)
         
@@ -6,33 +6,48 @@ This module extends the C AST parser to provide both:
 2. Complete coverage of the file including headers, section comments, etc.
 """
 
+import os
 import re
-import json
+import bisect
+import heapq
 import hashlib
 import sys
 import pathlib
 import argparse
-from typing import Dict, List, Optional, Set, Tuple, Any, Iterator
+import contextlib
+from typing import Callable, Dict, List, Optional, Set, Tuple, Any, Iterator
 from dataclasses import dataclass, field, asdict
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 # Import existing code
 from parsing.parsers.c_ast_parser_simple import (
-    _sha, _line_offsets, _byte_to_line, _find_nearest_comment,
-    _parse_doxygen_comment, ASTNode, RegexBasedCParser, CChunker
+    _sha, _line_offsets, _byte_to_line,
+    _parse_doxygen_comment, _newline_starts, _NODE_DATACLASS, ASTNode, RegexBasedCParser, CChunker
 )
 
 from parsing.parsers.cast_parser import CASTNode
 
 # Regular expressions for C code structures
-DOXYGEN_COMMENT = re.compile(r"/\*\*!(?:.|\n)*?\*/|/\*\*(?:.|\n)*?\*/", re.MULTILINE)
-C_COMMENT = re.compile(r"/\*(?:.|\n)*?\*/|//.*?$", re.MULTILINE)
-FILE_HEADER = re.compile(r"(?:/\*\*!(?:.|\n)*?\*/|/\*\*(?:.|\n)*?\*/|//!.*(?:\n//!.*)*)", re.MULTILINE)
+DOXYGEN_COMMENT = re.compile(r"/\*\*![\s\S]*?\*/|/\*\*[\s\S]*?\*/")
+C_COMMENT = re.compile(r"/\*[\s\S]*?\*/|//.*?$", re.MULTILINE)
+FILE_HEADER = re.compile(r"(?:/\*\*![\s\S]*?\*/|/\*\*[\s\S]*?\*/|//!.*(?:\n//!.*)*)")
 SECTION_HEADER = re.compile(r"(?:^|\n)[ \t]*//[^\n]*(?:=+)[^\n]*(?:\n//[^\n]*)*", re.MULTILINE)
 # Pattern to extract meaningful section titles from doxygen comments
-SECTION_TITLE = re.compile(r"//!\s*@brief\s+([^\n]+)", re.MULTILINE)
+SECTION_TITLE = re.compile(r"//!\s*@brief\s+([^\n]+)")
+# Pattern to extract a section name from the separator line itself
+SECTION_NAME = re.compile(r"//[^\n]*(?:@brief|\b(\w{3,})\b)[^\n]*(?:=+)")
+# Patterns used to count nested named struct/enum/union declarations
+NESTED_STRUCT = re.compile(r"struct\s+\w+\s*\{")
+NESTED_ENUM = re.compile(r"enum\s+\w+\s*\{")
+NESTED_UNION = re.compile(r"union\s+\w+\s*\{")
 
-@dataclass
+# Number of parse results kept by EnhancedCParser.parse_source
+PARSE_CACHE_SIZE = 64
+# Recently parsed sources, shared by all parser instances (least recently used first)
+_PARSE_CACHE: "OrderedDict[tuple, List[EnhancedNode]]" = OrderedDict()
+
+@dataclass(**_NODE_DATACLASS)
 class EnhancedNode(CASTNode):
     """
     Enhanced node with additional properties for complete coverage.
@@ -87,21 +102,57 @@ class EnhancedCParser(RegexBasedCParser):
         # Enhanced patterns
         self.PATTERNS.update({
             # Enhanced typedef patterns
-            "typedef_struct_named": re.compile(r"typedef\s+struct\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;", re.MULTILINE | re.DOTALL),
-            "typedef_enum_named": re.compile(r"typedef\s+enum\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;", re.MULTILINE | re.DOTALL),
-            "typedef_union_named": re.compile(r"typedef\s+union\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;", re.MULTILINE | re.DOTALL),
+            "typedef_struct_named": re.compile(r"typedef\s+struct\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;", re.DOTALL),
+            "typedef_enum_named": re.compile(r"typedef\s+enum\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;", re.DOTALL),
+            "typedef_union_named": re.compile(r"typedef\s+union\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;", re.DOTALL),
             
             # Additional patterns for embedded C specific constructs
-            "enum_definition": re.compile(r"enum\s*\{[^}]*\}\s*;", re.MULTILINE | re.DOTALL),
-            "struct_definition": re.compile(r"struct\s*\{[^}]*\}\s*;", re.MULTILINE | re.DOTALL),
+            "enum_definition": re.compile(r"enum\s*\{[^}]*\}\s*;", re.DOTALL),
+            "struct_definition": re.compile(r"struct\s*\{[^}]*\}\s*;", re.DOTALL),
             
             # Nested struct patterns
-            "nested_struct": re.compile(r"struct\s+(\w+)\s*\{[^{]*\{[^}]*\}[^}]*\}\s*;", re.MULTILINE | re.DOTALL),
-            "inner_struct": re.compile(r"struct\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;(?![^{]*\};)", re.MULTILINE | re.DOTALL),
+            "nested_struct": re.compile(r"struct\s+(\w+)\s*\{[^{]*\{[^}]*\}[^}]*\}\s*;", re.DOTALL),
+            "inner_struct": re.compile(r"struct\s+(\w+)\s*\{[^}]*\}\s*\w+\s*;(?![^{]*\};)", re.DOTALL),
         })
     
-    def parse_source(self, source: str, filepath: Optional[str] = None) -> List[EnhancedNode]:
-        """Parse C source code and extract nodes."""
+    def parse_source(self, source: str, filepath: Optional[str] = None,
+                     predicate: Optional[Callable[[EnhancedNode], bool]] = None) -> List[EnhancedNode]:
+        """
+        Parse C source code and extract nodes.
+        
+        Results are cached per source, file path and parser options, so chunking the
+        same file under several chunker settings only parses it once. The shared
+        pattern table is part of the key because other parsers update it.
+        
+        If predicate is given, only matching nodes and their ancestors are returned.
+        """
+        key = (_sha(source), filepath, self.include_comments, self.max_comment_gap,
+               self.include_file_headers, self.include_section_headers,
+               tuple(self.PATTERNS.values()))
+        nodes = _PARSE_CACHE.get(key)
+        if nodes is None:
+            nodes = self._parse_source(source, filepath)
+            _PARSE_CACHE[key] = nodes
+            if len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+                _PARSE_CACHE.popitem(last=False)
+        else:
+            _PARSE_CACHE.move_to_end(key)
+        
+        if predicate is not None:
+            # Keep the parents of matching nodes so the hierarchy stays intact
+            keep = set()
+            for node in nodes:
+                if predicate(node):
+                    while node is not None and node not in keep:
+                        keep.add(node)
+                        node = node.parent_node
+            return [n for n in nodes if n in keep]
+        
+        # Callers may reorder or filter the list; the nodes themselves are shared
+        return list(nodes)
+    
+    def _parse_source(self, source: str, filepath: Optional[str]) -> List[EnhancedNode]:
+        """Parse C source code into a node hierarchy, bypassing the cache."""
         base_nodes = super().parse_source(source, filepath)
         
         # Convert base nodes to EnhancedNodes
@@ -123,23 +174,37 @@ class EnhancedCParser(RegexBasedCParser):
             )
             nodes.append(enhanced_node)
         
-        # Add file header if requested
+        header_nodes = []
+        section_nodes = []
+        
+        # Line lookups for the structural nodes below; bisecting the line starts
+        # gives the same 1-based numbers as counting the newlines before an index
+        if self.include_file_headers or self.include_section_headers:
+            line_starts = _newline_starts(source)
+            line_of = lambda idx: bisect.bisect_right(line_starts, idx)
+        
+        # Add file header if requested. Every FILE_HEADER alternative starts with
+        # "/**" or "//!", so the regex only has to run from the first of those
+        # literals, and not at all when neither occurs.
+        header_starts = []
         if self.include_file_headers:
-            file_header_match = FILE_HEADER.search(source)
+            header_starts = [idx for idx in (source.find("/**"), source.find("//!")) if idx >= 0]
+        if header_starts:
+            file_header_match = FILE_HEADER.search(source, min(header_starts))
             if file_header_match:
                 start_idx = file_header_match.start()
                 end_idx = file_header_match.end()
-                start_line = self._find_line_number(source, start_idx)
-                end_line = self._find_line_number(source, end_idx)
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
                 
                 header_text = source[start_idx:end_idx]
                 
-                nodes.append(EnhancedNode(
+                header_nodes.append(EnhancedNode(
                     type="file_header",
                     code=header_text,
                     start_line=start_line,
                     end_line=end_line,
-                    name=filepath.split('/')[-1] if filepath else None,
+                    name=sys.intern(os.path.basename(filepath)) if filepath else None,
                     parent=None,
                     doxygen=None,
                     comments=[],
@@ -149,13 +214,14 @@ class EnhancedCParser(RegexBasedCParser):
                     is_structural=True
                 ))
         
-        # Add section headers if requested
-        if self.include_section_headers:
+        # Add section headers if requested. A section header is a // comment line
+        # containing at least one '=', so sources lacking either literal are skipped
+        if self.include_section_headers and "=" in source and "//" in source:
             for match in SECTION_HEADER.finditer(source):
                 start_idx = match.start()
                 end_idx = match.end()
-                start_line = self._find_line_number(source, start_idx)
-                end_line = self._find_line_number(source, end_idx)
+                start_line = line_of(start_idx)
+                end_line = line_of(end_idx)
                 
                 section_text = source[start_idx:end_idx]
                 
@@ -172,7 +238,7 @@ class EnhancedCParser(RegexBasedCParser):
                 
                 # If no doxygen title, try to extract a name from the separator line
                 if not section_name or len(section_name) < 3:  # Ignore very short names
-                    name_match = re.search(r"//[^\n]*(?:@brief|\b(\w{3,})\b)[^\n]*(?:=+)", section_text)
+                    name_match = SECTION_NAME.search(section_text)
                     if name_match and name_match.group(1):
                         candidate = name_match.group(1).strip()
                         # Skip single-letter names and common words like 'the', 'and', etc.
@@ -181,7 +247,7 @@ class EnhancedCParser(RegexBasedCParser):
                 
                 # Only add section headers with meaningful names
                 if section_name and len(section_name) > 2:
-                    nodes.append(EnhancedNode(
+                    section_nodes.append(EnhancedNode(
                         type="section_header",
                         code=section_text,
                         start_line=start_line,
@@ -196,8 +262,9 @@ class EnhancedCParser(RegexBasedCParser):
                         is_structural=True
                     ))
         
-        # Sort nodes by line number
-        nodes.sort(key=lambda n: n.start_line)
+        # Merge by line number; each list is already in source order and ties
+        # keep base nodes ahead of the file header and section headers
+        nodes = list(heapq.merge(nodes, header_nodes, section_nodes, key=lambda n: n.start_line))
         
         # Build hierarchy
         return self._build_hierarchy(nodes)
@@ -415,11 +482,65 @@ class EnhancedCParser(RegexBasedCParser):
             if node.children:
                 self._update_depths(node.children, current_depth + 1)
 
+def _pack_nodes(groups: List[Tuple[List[EnhancedNode], str]], max_size: int, overlap: int,
+                format_node: Callable[[EnhancedNode], str]) -> List[Tuple[List[EnhancedNode], str]]:
+    """
+    Pack node groups into buffered chunks of about max_size characters.
+    
+    Each group is a root node with its descendants plus the root's formatted content.
+    When a chunk is emitted, its last `overlap` nodes are carried into the next one,
+    formatted with format_node. The loop only touches ints, lists and strings, so it
+    stays a self-contained candidate for compiling with mypyc or Cython.
+    
+    Returns:
+        List of (nodes, content) pairs, one per chunk
+    """
+    packed: List[Tuple[List[EnhancedNode], str]] = []
+    nodes: List[EnhancedNode] = []
+    parts: List[str] = []  # pieces of the chunk text, joined once per chunk
+    length: int = 0
+    
+    for group_nodes, content in groups:
+        # If adding this group would exceed max size, emit the current buffer
+        if length and length + len(content) > max_size:
+            packed.append((nodes, "".join(parts)))
+            
+            # Handle overlap if needed
+            if overlap and nodes:
+                nodes = nodes[-overlap:]
+                text = "\n\n".join(format_node(n) for n in nodes)
+                parts, length = [text], len(text)
+            else:
+                nodes, parts, length = [], [], 0
+        
+        # Add the group to the buffer
+        nodes.extend(group_nodes)
+        if length:
+            parts.append("\n\n")
+            length += 2
+        parts.append(content)
+        length += len(content)
+    
+    # Emit any remaining buffer
+    if nodes:
+        packed.append((nodes, "".join(parts)))
+    return packed
+
 class EnhancedChunker(CChunker):
     """
     Enhanced chunker that provides both semantic chunking and complete coverage.
     """
     
+    # Node types considered "semantic". Node types are string literals in the
+    # parsers, so CPython interns them and lookups here hash pointer-identical keys.
+    SEMANTIC_TYPES = frozenset({
+        "function_definition", "declaration", "struct_specifier", "enum_specifier",
+        "union_specifier", "type_definition", "preproc_function_def", "preproc_def",
+        "typedef_struct", "typedef_enum", "typedef_union", "typedef_anon_struct",
+        "typedef_anon_enum", "typedef_anon_union", "typedef_struct_named",
+        "typedef_enum_named", "typedef_union_named"
+    })
+    
     def _emit_chunk(self, nodes, content, filepath=None, manual_depths=None):
         """Create a chunk from the given nodes and content."""
         first_node = nodes[0]
@@ -497,15 +618,7 @@ class EnhancedChunker(CChunker):
         self.overlap_units = chunk_overlap_units
         self.one_symbol_per_chunk = one_symbol_per_chunk
         self.semantic_only = semantic_only
-        
-        # Define which node types are considered "semantic"
-        self.semantic_types = {
-            "function_definition", "declaration", "struct_specifier", "enum_specifier",
-            "union_specifier", "type_definition", "preproc_function_def", "preproc_def",
-            "typedef_struct", "typedef_enum", "typedef_union", "typedef_anon_struct",
-            "typedef_anon_enum", "typedef_anon_union", "typedef_struct_named",
-            "typedef_enum_named", "typedef_union_named"
-        }
+        self.semantic_types = self.SEMANTIC_TYPES
     
     def chunkify(self, code: str, filepath: Optional[str] = None) -> List[Dict]:
         """
@@ -518,8 +631,16 @@ class EnhancedChunker(CChunker):
         Returns:
             List of chunks, each containing content and metadata
         """
-        # Get all nodes with hierarchy built
-        nodes = self.parser.parse_source(code, filepath)
+        # Get all nodes with hierarchy built; with semantic_only the parser drops
+        # non-semantic nodes (other than their parents) before we copy anything
+        predicate = None
+        if self.semantic_only:
+            semantic_types = self.semantic_types
+            predicate = lambda n: n.type in semantic_types
+        nodes = self.parser.parse_source(code, filepath, predicate)
+        
+        # Split the source into lines once; every chunk's depth calculation slices them
+        code_lines = code.splitlines()
         
         # Deduplicate nodes with the same type, name, start_line, and end_line
         unique_nodes = {}
@@ -538,20 +659,6 @@ class EnhancedChunker(CChunker):
         # Replace nodes with deduplicated list
         nodes = list(unique_nodes.values())
         
-        # Filter nodes if semantic_only is True
-        if self.semantic_only:
-            # We need to be careful not to break the hierarchy
-            # First, identify nodes to keep
-            keep_nodes = set(n for n in nodes if n.type in self.semantic_types)
-            # Then add all parents to ensure hierarchy is preserved
-            for node in list(keep_nodes):
-                parent = node.parent_node
-                while parent:
-                    keep_nodes.add(parent)
-                    parent = parent.parent_node
-            # Filter nodes
-            nodes = [n for n in nodes if n in keep_nodes]
-        
         # Get root nodes only (children are accessible through hierarchy)
         root_nodes = [n for n in nodes if not n.parent_node]
         
@@ -577,13 +684,15 @@ class EnhancedChunker(CChunker):
                 content = self._format_hierarchical_content(node)
                 
                 # Calculate manual depths based on nesting in the source code
-                manual_depths = self._calculate_manual_depths(all_nodes, code)
+                manual_depths = self._calculate_manual_depths(all_nodes, code, code_lines)
                 
                 chunks.append(self._emit_chunk(all_nodes, content, filepath, manual_depths))
             return chunks
         
-        # Buffered mode - group nodes into chunks
-        chunks, buffer, node_buffer = [], "", []
+        # Buffered mode - group each root node with its descendants, then pack
+        # the groups into chunks
+        groups = []
+        formatted = {}  # id(node) -> formatted content, reused when nodes are kept for overlap
         processed_node_ids = set()  # Track processed nodes by their unique identifier
         processed_group_ids = set()  # Track processed node groups
         
@@ -606,34 +715,17 @@ class EnhancedChunker(CChunker):
                 processed_node_ids.add(id(n))
             processed_group_ids.add(group_id)
             
-            node_content = self._format_hierarchical_content(node)
-            
-            # If adding this node would exceed max size, emit the current buffer
-            if buffer and (len(buffer) + len(node_content) > self.max_chunk_size):
-                # Calculate manual depths for this chunk
-                manual_depths = self._calculate_manual_depths(node_buffer, code)
-                
-                chunks.append(self._emit_chunk(node_buffer, buffer, filepath, manual_depths))
-                
-                # Handle overlap if needed
-                if self.overlap_units and node_buffer:
-                    keep = node_buffer[-self.overlap_units:]
-                    buffer = "\n\n".join(self._format_hierarchical_content(n) for n in keep)
-                    node_buffer = keep
-                else:
-                    buffer, node_buffer = "", []
-            
-            # Add the node and its descendants to the buffer
-            node_buffer.extend(all_nodes)
-            buffer = (buffer + "\n\n" + node_content) if buffer else node_content
-        
-        # Emit any remaining buffer
-        if node_buffer:
-            # Calculate manual depths for the final chunk
-            manual_depths = self._calculate_manual_depths(node_buffer, code)
-            
-            chunks.append(self._emit_chunk(node_buffer, buffer, filepath, manual_depths))
-            
+            formatted[id(node)] = node_content = self._format_hierarchical_content(node)
+            groups.append((all_nodes, node_content))
+        
+        def format_node(n):
+            return formatted[id(n)] if id(n) in formatted else self._format_hierarchical_content(n)
+        
+        chunks = []
+        for node_buffer, content in _pack_nodes(groups, self.max_chunk_size, self.overlap_units, format_node):
+            # Calculate manual depths for this chunk
+            manual_depths = self._calculate_manual_depths(node_buffer, code, code_lines)
+            chunks.append(self._emit_chunk(node_buffer, content, filepath, manual_depths))
         return chunks
         
     def _collect_descendants(self, node, result_list):
@@ -642,10 +734,12 @@ class EnhancedChunker(CChunker):
             result_list.append(child)
             self._collect_descendants(child, result_list)
             
-    def _calculate_manual_depths(self, nodes, code):
+    def _calculate_manual_depths(self, nodes, code, code_lines=None):
         """Calculate manual depth values based on nesting level in the code."""
         # Extract the lines of code
-        code_lines = code.splitlines()
+        if code_lines is None:
+            code_lines = code.splitlines()
+        has_funcblock = None  # whether the file mentions FUNCBLOCK, checked on first use
         
         # Map to store depth for each node
         depths = {}
@@ -665,9 +759,9 @@ class EnhancedChunker(CChunker):
                 if node.type in {"struct_specifier", "enum_specifier", "union_specifier", 
                                "typedef_struct", "typedef_enum", "typedef_union", "type_definition"}:
                     # Count nested struct/enum/union declarations
-                    struct_matches = list(re.finditer(r"struct\s+\w+\s*\{", node_code))
-                    enum_matches = list(re.finditer(r"enum\s+\w+\s*\{", node_code))
-                    union_matches = list(re.finditer(r"union\s+\w+\s*\{", node_code))
+                    struct_matches = list(NESTED_STRUCT.finditer(node_code))
+                    enum_matches = list(NESTED_ENUM.finditer(node_code))
+                    union_matches = list(NESTED_UNION.finditer(node_code))
                     
                     # Calculate depth based on nesting level
                     nested_depth = 0
@@ -684,7 +778,9 @@ class EnhancedChunker(CChunker):
                     # Check for FUNCBLOCK pattern (special case)
                     if node.type == "type_definition":
                         # Check if there's a FUNCBLOCK define in the code
-                        if "__FUNCBLOCK__" in code or "FUNCBLOCK_DEFINED" in code:
+                        if has_funcblock is None:
+                            has_funcblock = "__FUNCBLOCK__" in code or "FUNCBLOCK_DEFINED" in code
+                        if has_funcblock:
                             # For TBlockErrorState and TInputErrorState, always set depth to 2
                             if node.name in {"TBlockErrorState", "TInputErrorState"}:
                                 nested_depth = max(nested_depth, 2)
@@ -735,6 +831,24 @@ class EnhancedChunker(CChunker):
             content_list.append('')  # Empty line for separation
             self._format_node_recursive(child, content_list, indent_level + 1)
 
+# Per-process chunker used by the main() worker pool, created by _init_worker
+_chunker = None
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    """Create the chunker for a main() worker process."""
+    global _chunker
+    _chunker = EnhancedChunker(**options)
+
+def _process_file(path: pathlib.Path) -> bytes:
+    """Chunk one header file in a worker process and return its chunks as JSON lines."""
+    try:
+        source = pathlib.Path(path).read_text(encoding="utf-8", errors="ignore")
+        file_chunks = _chunker.chunkify(source, filepath=str(path))
+        return b"".join(_dumps(chunk) + b"\n" for chunk in file_chunks)
+    except Exception as e:
+        print(f"Error processing {path}: {e}", file=sys.stderr)
+        return b""
+
 def main():
     """Command-line interface for the enhanced chunker."""
     ap = argparse.ArgumentParser(description="Enhanced chunker for embedded C headers")
@@ -749,7 +863,7 @@ def main():
     ap.add_argument("--output", "-o", help="Output file (default: stdout)")
     args = ap.parse_args()
     
-    chunker = EnhancedChunker(
+    options = dict(
         max_chunk_size=args.max_chars,
         chunk_overlap_units=args.overlap,
         one_symbol_per_chunk=args.one_per_symbol,
@@ -758,27 +872,17 @@ def main():
         include_section_headers=not args.no_section_headers,
         semantic_only=args.semantic_only
     )
+    paths = list(_iter_header_files(args.inputs))
     
-    chunks = []
-    for path in _iter_header_files(args.inputs):
-        try:
-            source = pathlib.Path(path).read_text(encoding="utf-8", errors="ignore")
-            file_chunks = chunker.chunkify(source, filepath=str(path))
-            chunks.extend(file_chunks)
-        except Exception as e:
-            print(f"Error processing {path}: {e}", file=sys.stderr)
-    
-    # Output the chunks
-    if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            for chunk in chunks:
-                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
-    else:
-        for chunk in chunks:
-            print(json.dumps(chunk, ensure_ascii=False))
+    # Files are chunked and serialized in parallel across CPU cores; map()
+    # yields results in input order, so the output matches a sequential run
+    output = open(args.output, "wb") if args.output else contextlib.nullcontext(sys.stdout.buffer)
+    with output as out, ProcessPoolExecutor(initializer=_init_worker, initargs=(options,)) as executor:
+        for lines in executor.map(_process_file, paths, chunksize=8):
+            out.write(lines)
 
-# Reuse the header file iterator from the original code
-from parsing.parsers.c_ast_parser_simple import _iter_header_files
+# Reuse the header file iterator and JSON encoder from the original code
+from parsing.parsers.c_ast_parser_simple import _iter_header_files, _dumps
 
 if __name__ == "__main__":
     main()
@@ -64,17 +64,8 @@ def visualize_chunks(chunks: list) -> None:
         print("=" * 80)
         print()
 
-def main():
-    """Main entry point."""
-    parser = argparse.ArgumentParser(description="Visualize CAST chunks")
-    parser.add_argument("input", help="Header file to process")
-    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
-    parser.add_argument("--min-chars", type=int, default=200, help="Min characters per chunk")
-    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
-    parser.add_argument("--no-hierarchy", action="store_true", help="Ignore hierarchical relationships")
-    parser.add_argument("--output", "-o", help="Save chunks to JSON file")
-    args = parser.parse_args()
-    
+def run(args: argparse.Namespace) -> None:
+    """Process a header file and visualize its CAST chunks."""
     # Process the file
     chunks = process_file(
         args.input, 
@@ -94,5 +85,17 @@ def main():
     # Visualize chunks
     visualize_chunks(chunks)
 
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Visualize CAST chunks")
+    parser.add_argument("input", help="Header file to process")
+    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
+    parser.add_argument("--min-chars", type=int, default=200, help="Min characters per chunk")
+    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
+    parser.add_argument("--no-hierarchy", action="store_true", help="Ignore hierarchical relationships")
+    parser.add_argument("--output", "-o", help="Save chunks to JSON file")
+    args = parser.parse_args()
+    run(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
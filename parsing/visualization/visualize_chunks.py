@@ -108,16 +108,8 @@ def visualize_chunks_rich(chunks: List[Dict]) -> None:
         console.print(Panel(syntax, title="Content"))
         console.print()
 
-def main():
-    """Main entry point."""
-    parser = argparse.ArgumentParser(description="Visualize C code chunks")
-    parser.add_argument("input", help="Header file to process")
-    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
-    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
-    parser.add_argument("--output", "-o", help="Save chunks to JSON file")
-    parser.add_argument("--plain", action="store_true", help="Use plain text output instead of rich formatting")
-    args = parser.parse_args()
-    
+def run(args: argparse.Namespace) -> None:
+    """Process a header file and visualize its chunks."""
     # Process the file
     chunks = process_file(args.input, args.max_chars, args.one_per_symbol)
     
@@ -134,6 +126,17 @@ def main():
     else:
         visualize_chunks_plain(chunks)
 
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Visualize C code chunks")
+    parser.add_argument("input", help="Header file to process")
+    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
+    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
+    parser.add_argument("--output", "-o", help="Save chunks to JSON file")
+    parser.add_argument("--plain", action="store_true", help="Use plain text output instead of rich formatting")
+    args = parser.parse_args()
+    run(args)
+
 if __name__ == "__main__":
     main()
 
@@ -62,18 +62,8 @@ def visualize_chunks(chunks: list) -> None:
         print("=" * 80)
         print()
 
-def main():
-    """Main entry point."""
-    parser = argparse.ArgumentParser(description="Visualize enhanced C chunks")
-    parser.add_argument("input", help="Header file to process")
-    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
-    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
-    parser.add_argument("--no-file-headers", action="store_true", help="Exclude file headers")
-    parser.add_argument("--no-section-headers", action="store_true", help="Exclude section headers")
-    parser.add_argument("--semantic-only", action="store_true", help="Only include semantic elements")
-    parser.add_argument("--output", "-o", help="Save chunks to JSON file")
-    args = parser.parse_args()
-    
+def run(args: argparse.Namespace) -> None:
+    """Process a header file and visualize its enhanced chunks."""
     # Process the file
     chunks = process_file(
         args.input, 
@@ -94,5 +84,18 @@ def main():
     # Visualize chunks
     visualize_chunks(chunks)
 
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Visualize enhanced C chunks")
+    parser.add_argument("input", help="Header file to process")
+    parser.add_argument("--max-chars", type=int, default=1600, help="Max characters per chunk")
+    parser.add_argument("--one-per-symbol", action="store_true", help="One chunk per symbol")
+    parser.add_argument("--no-file-headers", action="store_true", help="Exclude file headers")
+    parser.add_argument("--no-section-headers", action="store_true", help="Exclude section headers")
+    parser.add_argument("--semantic-only", action="store_true", help="Only include semantic elements")
+    parser.add_argument("--output", "-o", help="Save chunks to JSON file")
+    args = parser.parse_args()
+    run(args)
+
 if __name__ == "__main__":
     main()